@@ -0,0 +1,74 @@
+"""Load-test connection pool sizing: throughput and checkout wait per pool size
+
+Usage (from backend/):
+    python -m benchmarks.bench_db_pool --sizes 2,5,10,20 --concurrency 32 --seconds 5 --hold-ms 5
+
+Runs against DATABASE_URL when set (e.g. a local MySQL), otherwise a
+temporary SQLite file as a stand-in.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from services.db_pool import InstrumentedQueuePool, metrics
+
+
+def run(url, pool_size, overflow, concurrency, seconds, hold, timeout):
+    engine = create_engine(
+        url, poolclass=InstrumentedQueuePool, pool_size=pool_size, max_overflow=overflow,
+        pool_timeout=timeout, pool_pre_ping=True
+    )
+    metrics.reset()
+    stop = time.perf_counter() + seconds
+    completed = [0] * concurrency
+
+    def worker(slot):
+        while time.perf_counter() < stop:
+            try:
+                with engine.connect() as connection:
+                    connection.execute(text('SELECT 1')).scalar()
+                    # Stand-in for the rest of the request holding the connection
+                    time.sleep(hold)
+                completed[slot] += 1
+            except PoolTimeout:
+                pass
+
+    threads = [threading.Thread(target=worker, args=(slot,)) for slot in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stats = metrics.snapshot(engine.pool)
+    engine.dispose()
+    checkout = stats['checkout_ms']
+    print(f"pool {pool_size:>3}+{overflow:<3} | {sum(completed) / elapsed:9.1f} req/s | "
+          f"checkout p50 {checkout['p50'] or 0:8.2f} ms  p95 {checkout['p95'] or 0:8.2f} ms  "
+          f"max {checkout['max']:8.2f} ms | peak waiting {stats['peak_waiting']:>3} | "
+          f"timeouts {stats['timeouts']:>4} | connects {stats['connects']:>3}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='2,5,10,20')
+    parser.add_argument('--overflow', type=int, default=0)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--hold-ms', type=float, default=5)
+    parser.add_argument('--timeout', type=float, default=10)
+    args = parser.parse_args()
+
+    url = os.environ.get('DATABASE_URL') or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_pool_'), 'bench.db')}"
+    print(f'{url.split("@")[-1]} | {args.concurrency} threads | {args.hold_ms} ms held per request')
+    for size in (int(s) for s in args.sizes.split(',')):
+        run(url, size, args.overflow, args.concurrency, args.seconds, args.hold_ms / 1000, args.timeout)
+
+
+if __name__ == '__main__':
+    main()
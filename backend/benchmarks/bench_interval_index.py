@@ -0,0 +1,82 @@
+"""Compare the in-memory amount interval index against the SQL range filter
+
+Usage (from backend/):
+    python -m benchmarks.bench_interval_index --sizes 10000,100000,1000000
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import create_engine, insert, select
+
+from models import db, AdminBank, LoanProduct
+from services.interval_index import AmountIntervalIndex
+
+
+def seed(engine, size, rng):
+    db.metadata.create_all(engine, tables=[AdminBank.__table__, LoanProduct.__table__])
+    products = []
+    for i in range(size):
+        lo = round(rng.uniform(10_000, 5_000_000), 2)
+        products.append({
+            'bank_id': 1,
+            'product_name': f'Product {i}',
+            'min_amount': lo,
+            'max_amount': round(lo + rng.uniform(50_000, 2_000_000), 2),
+            'interest_rate': 10.5
+        })
+    with engine.begin() as conn:
+        conn.execute(insert(AdminBank.__table__), [{'bank_id': 1, 'bank_name': 'Bench Bank'}])
+        conn.execute(insert(LoanProduct.__table__), products)
+    return products
+
+
+def bench(size, queries, rng):
+    engine = create_engine('sqlite://')
+    products = seed(engine, size, rng)
+    table = LoanProduct.__table__
+
+    started = time.perf_counter()
+    index = AmountIntervalIndex(
+        (p['min_amount'], p['max_amount'], i) for i, p in enumerate(products)
+    )
+    build_ms = (time.perf_counter() - started) * 1000
+
+    ranges = []
+    for _ in range(queries):
+        lo = rng.uniform(10_000, 7_000_000)
+        ranges.append((lo, lo + rng.uniform(0, 100_000)))
+
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        sql_hits = sum(
+            len(conn.execute(
+                select(table.c.loan_product_id).where(table.c.max_amount >= lo, table.c.min_amount <= hi)
+            ).all())
+            for lo, hi in ranges
+        )
+    sql_ms = (time.perf_counter() - started) * 1000 / queries
+
+    started = time.perf_counter()
+    index_hits = sum(len(index.overlapping(lo, hi)) for lo, hi in ranges)
+    index_ms = (time.perf_counter() - started) * 1000 / queries
+
+    assert sql_hits == index_hits, (sql_hits, index_hits)
+    print(f'{size:>9,} products | build {build_ms:9.1f} ms | '
+          f'sql {sql_ms:8.3f} ms/query | index {index_ms:8.3f} ms/query | '
+          f'avg hits {index_hits / queries:9.1f} | speedup {sql_ms / index_ms:6.1f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    for size in (int(s) for s in args.sizes.split(',')):
+        bench(size, args.queries, rng)
+
+
+if __name__ == '__main__':
+    main()
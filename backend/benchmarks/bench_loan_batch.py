@@ -0,0 +1,79 @@
+"""Compare batch loan approval with the per-loan approve endpoint
+
+Usage (from backend/):
+    python -m benchmarks.bench_loan_batch --sizes 100,1000,5000 --chunk-size 500
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, datetime
+
+from sqlalchemy import insert
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='100,1000,5000')
+    parser.add_argument('--chunk-size', type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_loan_batch_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from flask_jwt_extended import create_access_token
+
+    from app import app
+    from models import db, AdminBank, LoanProduct, Loan, PersonalDetails
+
+    with app.app_context():
+        db.create_all()
+        bank = AdminBank(bank_name='Bench Bank')
+        db.session.add(bank)
+        db.session.flush()
+        # One product per loan: a user may only have one pending application per product
+        product_ids = db.session.execute(insert(LoanProduct).returning(LoanProduct.loan_product_id), [
+            {'bank_id': bank.bank_id, 'product_name': f'Bench Loan {i}', 'min_amount': 10000,
+             'max_amount': 5000000, 'interest_rate': 10.5}
+            for i in range(max(int(s) for s in args.sizes.split(',')))
+        ]).scalars().all()
+        admin = PersonalDetails(
+            full_name='Bench Admin', email='admin@loanhub.com', date_of_birth=date(1990, 1, 1), gender='Other',
+            nationality='Indian', marital_status='Single', contact_number='9999999999', permanent_address='-'
+        )
+        admin.set_password('BenchPass123')
+        db.session.add(admin)
+        db.session.commit()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.user_id))}'}
+
+        def pending_loans(count):
+            loan_ids = db.session.execute(insert(Loan).returning(Loan.loan_id), [
+                {'user_id': admin.user_id, 'loan_product_id': product_id, 'loan_amount': 100000,
+                 'tenure_months': 12, 'interest_rate': 10.5, 'monthly_emi': 8800, 'status': 'Pending',
+                 'application_date': datetime.utcnow()}
+                for product_id in product_ids[:count]
+            ]).scalars().all()
+            db.session.commit()
+            return loan_ids
+
+        client = app.test_client()
+        for size in (int(s) for s in args.sizes.split(',')):
+            loan_ids = pending_loans(size)
+            started = time.perf_counter()
+            for loan_id in loan_ids:
+                assert client.post(f'/api/admin/loans/{loan_id}/approve', headers=headers).status_code == 200
+            loop_ms = (time.perf_counter() - started) * 1000
+
+            loan_ids = pending_loans(size)
+            started = time.perf_counter()
+            response = client.post(f'/api/admin/loans/batch/approve?chunk_size={args.chunk_size}',
+                                   headers=headers, json={'loan_ids': loan_ids})
+            batch_ms = (time.perf_counter() - started) * 1000
+            assert response.get_json()['summary']['updated'] == size
+
+            print(f'{size:>6,} loans | per-loan loop {loop_ms:9.1f} ms ({loop_ms / size:6.3f} ms/loan) | '
+                  f'batch {batch_ms:8.1f} ms ({batch_ms / size:6.3f} ms/loan) | speedup {loop_ms / batch_ms:6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
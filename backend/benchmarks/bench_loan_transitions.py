@@ -0,0 +1,134 @@
+"""Stress loan status transitions: parallel workers racing on the same loans
+
+Usage (from backend/):
+    python -m benchmarks.bench_loan_transitions --loans 20 --concurrency 16 --seconds 5
+
+Each worker reads a random loan from a small hot set and applies the next step
+of Pending -> Approved -> Active -> Closed to it; closed loans are reopened.
+Reports transitions/s, the CAS conflict rate and whether the status rollup
+still matches the loans table (it would drift on a double transition). Runs
+against DATABASE_URL when set, otherwise a temporary SQLite file.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+
+from sqlalchemy import insert, update
+
+NEXT_ACTION = {'Pending': 'approve', 'Approved': 'disburse', 'Active': 'pre_close'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--loans', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if not os.environ.get('DATABASE_URL'):
+        workdir = tempfile.mkdtemp(prefix='bench_transitions_')
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from app import app
+    from models import db, AdminBank, LoanProduct, Loan, LoanStatsRollup, PersonalDetails
+    from services.loan_state import InvalidTransition, TransitionConflict, transition
+    from services.stats import aggregate_by_status, read_rollup, rebuild_rollup, record_transition
+
+    with app.app_context():
+        db.create_all()
+        bank = AdminBank(bank_name='Bench Bank')
+        db.session.add(bank)
+        db.session.flush()
+        # One product per loan: a user may only have one pending application per product
+        product_ids = db.session.execute(insert(LoanProduct).returning(LoanProduct.loan_product_id), [
+            {'bank_id': bank.bank_id, 'product_name': f'Bench Loan {i}', 'min_amount': 10000,
+             'max_amount': 5000000, 'interest_rate': 10.5}
+            for i in range(args.loans)
+        ]).scalars().all()
+        user = PersonalDetails(
+            full_name='Bench User', email='bench@example.com', date_of_birth=date(1990, 1, 1), gender='Other',
+            nationality='Indian', marital_status='Single', contact_number='9999999999', permanent_address='-'
+        )
+        user.set_password('BenchPass123')
+        db.session.add(user)
+        db.session.flush()
+        loan_ids = db.session.execute(insert(Loan).returning(Loan.loan_id), [
+            {'user_id': user.user_id, 'loan_product_id': product_id, 'loan_amount': 100000,
+             'tenure_months': 12, 'interest_rate': 10.5, 'monthly_emi': 8800, 'status': 'Pending',
+             'application_date': datetime.utcnow()}
+            for product_id in product_ids
+        ]).scalars().all()
+        rebuild_rollup()
+        db.session.commit()
+
+    counts = {'transitions': 0, 'conflicts': 0, 'stale_reads': 0, 'reopened': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def worker(slot):
+        rng = random.Random(args.seed + slot)
+        with app.app_context():
+            while time.perf_counter() < deadline:
+                key = 'transitions'
+                try:
+                    loan = db.session.get(Loan, rng.choice(loan_ids))
+                    action = NEXT_ACTION.get(loan.status)
+                    if action:
+                        transition(loan, action)
+                    else:
+                        # Benchmark-only reopen, itself a CAS on version
+                        previous_status = loan.status
+                        result = db.session.execute(
+                            update(Loan)
+                            .where(Loan.loan_id == loan.loan_id, Loan.version == loan.version)
+                            .values(status='Pending', version=loan.version + 1)
+                            .execution_options(synchronize_session=False)
+                        )
+                        if result.rowcount != 1:
+                            raise TransitionConflict('reopen lost the race')
+                        record_transition(previous_status, 'Pending', loan.loan_amount)
+                        key = 'reopened'
+                    db.session.commit()
+                except TransitionConflict:
+                    db.session.rollback()
+                    key = 'conflicts'
+                except InvalidTransition:
+                    db.session.rollback()
+                    key = 'stale_reads'
+                except Exception:
+                    db.session.rollback()
+                    key = 'errors'
+                finally:
+                    db.session.remove()
+                with lock:
+                    counts[key] += 1
+
+    threads = [threading.Thread(target=worker, args=(slot,)) for slot in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        # A drifted rollup is cleared, and read_rollup then falls back to the loans table
+        seeded = LoanStatsRollup.query.count() > 0
+        rollup = {status: count for status, (count, _) in read_rollup().items()}
+        actual = {status: count for status, (count, _) in aggregate_by_status().items()}
+
+    attempts = counts['transitions'] + counts['conflicts'] + counts['stale_reads']
+    print(f"{args.concurrency} workers on {args.loans} loans for {elapsed:.1f}s")
+    print(f"transitions {counts['transitions']:>7} ({counts['transitions'] / elapsed:8.1f}/s) | "
+          f"conflicts {counts['conflicts']:>6} ({counts['conflicts'] / max(attempts, 1):6.1%}) | "
+          f"stale reads {counts['stale_reads']:>5} | reopened {counts['reopened']:>5} | errors {counts['errors']:>4}")
+    print(f"rollup matches loans table: {seeded and rollup == actual}" + ('' if seeded else ' (cleared after drift)'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Measure /api/auth/login throughput against a seeded SQLite database
+
+Usage (from backend/):
+    python -m benchmarks.bench_login --users 50 --concurrency 8 --seconds 10 \
+        --method pbkdf2:sha256:600000 --hash-workers 4
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--method', default='pbkdf2:sha256:600000')
+    parser.add_argument('--hash-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--executor', choices=['thread', 'process'], default='thread')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_login_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['PASSWORD_HASH_METHOD'] = args.method
+    os.environ['PASSWORD_HASH_WORKERS'] = str(args.hash_workers)
+    os.environ['PASSWORD_HASH_EXECUTOR'] = args.executor
+
+    from app import app
+    from models import db, PersonalDetails
+
+    with app.app_context():
+        db.create_all()
+        for i in range(args.users):
+            user = PersonalDetails(
+                full_name=f'Bench User {i}', email=f'bench{i}@example.com', date_of_birth=date(1990, 1, 1),
+                gender='Other', nationality='Indian', marital_status='Single', contact_number='9999999999',
+                permanent_address='Bench Street'
+            )
+            user.set_password('BenchPass123')
+            db.session.add(user)
+        db.session.commit()
+
+    counts = {'ok': 0, 'busy': 0, 'failed': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def worker(offset):
+        client = app.test_client()
+        i = offset
+        while time.perf_counter() < deadline:
+            response = client.post('/api/auth/login', json={
+                'email': f'bench{i % args.users}@example.com', 'password': 'BenchPass123'
+            })
+            key = 'ok' if response.status_code == 200 else 'busy' if response.status_code == 503 else 'failed'
+            with lock:
+                counts[key] += 1
+            i += args.concurrency
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    cores = min(args.hash_workers, os.cpu_count() or 1)
+    rate = counts['ok'] / elapsed
+    print(f"method={args.method} executor={args.executor} hash_workers={args.hash_workers} "
+          f"concurrency={args.concurrency}")
+    print(f"{counts['ok']} logins in {elapsed:.1f}s = {rate:.1f} logins/s, {rate / cores:.1f} logins/s per core "
+          f"({counts['busy']} busy, {counts['failed']} failed)")
+
+
+if __name__ == '__main__':
+    main()
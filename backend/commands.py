@@ -0,0 +1,130 @@
+import click
+from flask.cli import with_appcontext
+
+from models import db
+
+
+@click.command('rebuild-loan-stats')
+@with_appcontext
+def rebuild_loan_stats_command():
+    """Recompute loan_stats_rollup and loan_application_daily from the loans table"""
+    from services.stats import rebuild_daily_counts, rebuild_rollup
+    rebuild_rollup()
+    rebuild_daily_counts()
+    db.session.commit()
+    click.echo('Loan statistics rollup and daily application counts rebuilt')
+
+
+@click.command('score-preapprovals')
+@click.option('--chunk-size', default=5000, show_default=True, help='Applicants per chunk.')
+@click.option('--workers', type=int, default=None, help='Scoring processes (default: CPU count).')
+@click.option('--tenure', 'tenure_months', default=12, show_default=True, help='Tenure used for offer amounts.')
+@click.option('--keep-previous', is_flag=True, help='Keep offers from earlier runs.')
+@with_appcontext
+def score_preapprovals_command(chunk_size, workers, tenure_months, keep_previous):
+    """Score every user against every loan product into preapproved_offers"""
+    from services.scoring import run_scoring
+    stats = run_scoring(
+        chunk_size=chunk_size, workers=workers, tenure_months=tenure_months, replace=not keep_previous
+    )
+    click.echo(
+        f"Run {stats['run_id']}: {stats['users']} users x {stats['products']} products, "
+        f"{stats['offers_written']} offers in {stats['seconds']}s "
+        f"({stats['users_per_second']} users/s, {stats['pairs_per_second']} pairs/s)"
+    )
+
+
+@click.command('import-users')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default=None,
+              help='File format (default: from the extension).')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows per insert batch.')
+@click.option('--workers', type=int, default=None, help='Password hashing processes (default: CPU count).')
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False), default=None,
+              help='Write per-row errors to this file as NDJSON.')
+@with_appcontext
+def import_users_command(path, fmt, chunk_size, workers, errors_path):
+    """Bulk-create users from a partner CSV or NDJSON file"""
+    import json
+    from services.user_import import iter_rows, import_users
+    fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+    with open(path, 'rb') as f:
+        report = import_users(iter_rows(f, fmt), chunk_size=chunk_size, workers=workers)
+    if errors_path:
+        with open(errors_path, 'w') as f:
+            for error in report['errors']:
+                f.write(json.dumps(error) + '\n')
+    click.echo(
+        f"Imported {report['imported']} of {report['rows']} rows in {report['seconds']}s "
+        f"({report['rows_per_second']} rows/s), {report['failed']} failed"
+    )
+    if not errors_path:
+        for error in report['errors'][:20]:
+            click.echo(f"  row {error['row']}: {error['error']}", err=True)
+
+
+@click.command('process-documents')
+@click.option('--batch-size', default=10, show_default=True, help='Jobs claimed per round.')
+@click.option('--poll', 'poll_interval', default=2.0, show_default=True, help='Seconds between polls of an empty queue.')
+@click.option('--once', is_flag=True, help='Exit when the queue is empty.')
+@with_appcontext
+def process_documents_command(batch_size, poll_interval, once):
+    """Build previews, page counts and checksums for queued document uploads"""
+    from services.documents import run_worker
+    counts = run_worker(batch_size=batch_size, once=once, poll_interval=poll_interval)
+    click.echo(', '.join(f'{count} {status.lower()}' for status, count in sorted(counts.items())) or 'No queued documents')
+
+
+@click.command('advise-indexes')
+@click.option('--scratch', is_flag=True, help='EXPLAIN against a seeded temporary SQLite database instead.')
+@click.option('--users', default=2000, show_default=True, help='Synthetic users for --scratch.')
+@click.option('--loans', default=50000, show_default=True, help='Synthetic loans for --scratch.')
+@click.option('--fail-on-findings', is_flag=True, help='Exit non-zero if any shape scans or sorts.')
+@with_appcontext
+def advise_indexes_command(scratch, users, loans, fail_on_findings):
+    """EXPLAIN the hot loan queries and flag full table scans and sorts"""
+    import os
+    import tempfile
+    from services.index_advisor import advise, seed_scratch
+    if scratch:
+        engine = seed_scratch(os.path.join(tempfile.mkdtemp(prefix='advise_'), 'scratch.db'), users=users, loans=loans)
+    else:
+        engine = db.engine
+    report = advise(engine)
+    for shape in report:
+        status = 'FLAG' if shape['findings'] else 'ok'
+        click.echo(f"[{status:>4}] {shape['name']} ({shape['endpoint']})")
+        for line in shape['plan']:
+            click.echo(f'         {line}')
+        for finding in shape['findings']:
+            click.echo(f'       ! {finding}')
+    flagged = sum(1 for shape in report if shape['findings'])
+    click.echo(f'{flagged} of {len(report)} query shapes flagged')
+    if fail_on_findings and flagged:
+        raise SystemExit(1)
+
+
+@click.command('purge-idempotency-keys')
+@with_appcontext
+def purge_idempotency_keys_command():
+    """Delete expired Idempotency-Key responses"""
+    from services.idempotency import idempotency_keys
+    click.echo(f'Removed {idempotency_keys.purge_expired()} expired idempotency keys')
+
+
+@click.command('purge-revoked-tokens')
+@with_appcontext
+def purge_revoked_tokens_command():
+    """Delete revocations of access tokens that have expired"""
+    from services.auth_state import purge_revoked_tokens
+    click.echo(f'Removed {purge_revoked_tokens()} expired token revocations')
+
+
+def register_commands(app):
+    app.cli.add_command(rebuild_loan_stats_command)
+    app.cli.add_command(score_preapprovals_command)
+    app.cli.add_command(import_users_command)
+    app.cli.add_command(process_documents_command)
+    app.cli.add_command(advise_indexes_command)
+    app.cli.add_command(purge_idempotency_keys_command)
+    app.cli.add_command(purge_revoked_tokens_command)
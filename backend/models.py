@@ -243,10 +243,15 @@
 
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects import mysql
+from services.passwords import hasher
 
 db = SQLAlchemy()
 
+# Microsecond precision on MySQL so two edits within a second get distinct versions
+PreciseDateTime = db.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql')
+
 class PersonalDetails(db.Model):
     """User Personal Details Table"""
     __tablename__ = 'personal_details'
@@ -264,6 +269,9 @@ class PersonalDetails(db.Model):
     is_email_verified = db.Column(db.Boolean, default=False)
     is_phone_verified = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(PreciseDateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Tokens issued up to this moment are rejected (password change, role change)
+    tokens_revoked_at = db.Column(PreciseDateTime)
     
     # Relationships
     financial_details = db.relationship('FinancialDetails', backref='user', uselist=False, cascade='all, delete-orphan')
@@ -273,10 +281,13 @@ class PersonalDetails(db.Model):
     loans = db.relationship('Loan', backref='user', cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        return hasher.needs_rehash(self.password_hash)
     
     def to_dict(self):
         return {
@@ -305,6 +316,7 @@ class FinancialDetails(db.Model):
     monthly_emi = db.Column(db.Numeric(15, 2), default=0)
     assets_owned = db.Column(db.Text)
     bank_account_details = db.Column(db.Text, nullable=False)
+    updated_at = db.Column(PreciseDateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
         return {
@@ -329,6 +341,7 @@ class EmploymentDetails(db.Model):
     monthly_income = db.Column(db.Numeric(15, 2), nullable=False)
     other_income = db.Column(db.Numeric(15, 2), default=0)
     income_proof_path = db.Column(db.String(255))
+    updated_at = db.Column(PreciseDateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
         return {
@@ -343,6 +356,10 @@ class EmploymentDetails(db.Model):
         }
 
 
+# Document kinds, each stored in UserDocuments.<type>_path
+DOCUMENT_TYPES = ('govt_id', 'address_proof', 'pan_card', 'photo', 'other_docs')
+
+
 class UserDocuments(db.Model):
     """User Documents Table"""
     __tablename__ = 'user_documents'
@@ -355,6 +372,7 @@ class UserDocuments(db.Model):
     photo_path = db.Column(db.String(255))
     other_docs_path = db.Column(db.String(255))
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(PreciseDateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
         return {
@@ -390,7 +408,7 @@ class LoanProduct(db.Model):
     __tablename__ = 'loan_products'
     
     loan_product_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    bank_id = db.Column(db.Integer, db.ForeignKey('admin_banks.bank_id'), nullable=False)
+    bank_id = db.Column(db.Integer, db.ForeignKey('admin_banks.bank_id'), nullable=False, index=True)
     product_name = db.Column(db.String(120), nullable=False)
     description = db.Column(db.Text)
     min_amount = db.Column(db.Numeric(12, 2))
@@ -449,6 +467,23 @@ class AdminBank(db.Model):
 class Loan(db.Model):
     """Loans Table"""
     __tablename__ = 'loans'
+    # One index per hot query shape (see `flask advise-indexes`)
+    __table_args__ = (
+        # /my-loans, newest first, with and without a status filter; active-loan counts
+        db.Index('ix_loans_user_date', 'user_id', 'application_date'),
+        db.Index('ix_loans_user_status_date', 'user_id', 'status', 'application_date'),
+        # At most one pending application per user and product (/loans/apply relies on it).
+        # Partial unique indexes exist on SQLite/PostgreSQL; MySQL gets the equivalent
+        # generated column and index from _loans_pending_unique_mysql below
+        db.Index(
+            'uq_loans_user_product_pending', 'user_id', 'loan_product_id', unique=True,
+            sqlite_where=db.text("status = 'Pending'"), postgresql_where=db.text("status = 'Pending'")
+        ).ddl_if(dialect=('sqlite', 'postgresql')),
+        # Admin loan list keyset pages: unfiltered, by status, by bank (via product)
+        db.Index('ix_loans_date_id', 'application_date', 'loan_id'),
+        db.Index('ix_loans_status_date_id', 'status', 'application_date', 'loan_id'),
+        db.Index('ix_loans_product_date_id', 'loan_product_id', 'application_date', 'loan_id'),
+    )
     
     loan_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('personal_details.user_id'), nullable=False)
@@ -457,11 +492,14 @@ class Loan(db.Model):
     tenure_months = db.Column(db.Integer)
     interest_rate = db.Column(db.Float)
     monthly_emi = db.Column(db.Numeric(15, 2))
-    status = db.Column(db.Enum('Pending', 'Approved', 'Rejected', 'Closed', 'Active'), default='Pending', index=True)
+    # No single-column index: ix_loans_status_date_id leads with status
+    status = db.Column(db.Enum('Pending', 'Approved', 'Rejected', 'Closed', 'Active'), default='Pending')
     application_date = db.Column(db.DateTime, default=datetime.utcnow)
     approval_date = db.Column(db.DateTime)
     disbursal_date = db.Column(db.DateTime)
     pre_closure_date = db.Column(db.DateTime)
+    # Bumped by every status transition (see services/loan_state.py)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     def to_dict(self):
         return {
@@ -478,9 +516,161 @@ class Loan(db.Model):
             'application_date': self.application_date.isoformat() if self.application_date else None,
             'approval_date': self.approval_date.isoformat() if self.approval_date else None,
             'disbursal_date': self.disbursal_date.isoformat() if self.disbursal_date else None,
-            'pre_closure_date': self.pre_closure_date.isoformat() if self.pre_closure_date else None
+            'pre_closure_date': self.pre_closure_date.isoformat() if self.pre_closure_date else None,
+            'version': self.version
         }
 
 
+# MySQL has no partial indexes: a generated column that is NULL unless the loan is
+# pending gives the same guarantee, since NULLs never collide in a unique index.
+# Kept out of the mapped columns; existing databases get it from
+# database/migrations/005_idempotency_keys.sql
+_loans_pending_unique_mysql = DDL(
+    "ALTER TABLE loans "
+    "ADD COLUMN pending_loan_product_id INT "
+    "AS (CASE WHEN status = 'Pending' THEN loan_product_id END) VIRTUAL, "
+    "ADD UNIQUE INDEX uq_loans_user_product_pending (user_id, pending_loan_product_id)"
+).execute_if(dialect='mysql')
+event.listen(Loan.__table__, 'after_create', _loans_pending_unique_mysql)
 
 
+class LoanStatsRollup(db.Model):
+    """Per-status loan counters maintained alongside loan status changes"""
+    __tablename__ = 'loan_stats_rollup'
+    
+    status = db.Column(db.String(20), primary_key=True)
+    loan_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Numeric(18, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'status': self.status,
+            'loan_count': self.loan_count,
+            'total_amount': float(self.total_amount) if self.total_amount else 0,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class LoanApplicationDaily(db.Model):
+    """Loan applications per calendar day (UTC), maintained alongside new applications"""
+    __tablename__ = 'loan_application_daily'
+    
+    day = db.Column(db.Date, primary_key=True)
+    application_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Numeric(18, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'application_count': self.application_count,
+            'total_amount': float(self.total_amount) if self.total_amount else 0,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class IdempotencyKey(db.Model):
+    """Stored responses for client-supplied Idempotency-Key headers, kept until expires_at"""
+    __tablename__ = 'idempotency_keys'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('personal_details.user_id'), primary_key=True)
+    idempotency_key = db.Column(db.String(255), primary_key=True)
+    # SHA-256 of the request body, so a key reused for a different request is rejected
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer, nullable=False)
+    response_body = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class RevokedToken(db.Model):
+    """Access tokens revoked by logout, kept until they would have expired anyway"""
+    __tablename__ = 'revoked_tokens'
+    
+    jti = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('personal_details.user_id'), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class PreapprovedOffer(db.Model):
+    """Pre-approved offers produced by the offline eligibility scoring job"""
+    __tablename__ = 'preapproved_offers'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    run_id = db.Column(db.String(32), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('personal_details.user_id'), nullable=False, index=True)
+    loan_product_id = db.Column(db.Integer, db.ForeignKey('loan_products.loan_product_id'), nullable=False)
+    maximum_eligible_amount = db.Column(db.Numeric(15, 2), nullable=False)
+    tenure_months = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'run_id': self.run_id,
+            'user_id': self.user_id,
+            'loan_product_id': self.loan_product_id,
+            'maximum_eligible_amount': float(self.maximum_eligible_amount) if self.maximum_eligible_amount else None,
+            'tenure_months': self.tenure_months,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class DocumentBlob(db.Model):
+    """Content-addressed upload stored once under uploads/blobs, shared by reference"""
+    __tablename__ = 'document_blobs'
+    
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    content_type = db.Column(db.String(100))
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Filled in by the document processing worker (flask process-documents)
+    page_count = db.Column(db.Integer)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    preview_path = db.Column(db.String(255))
+    processed_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'sha256': self.sha256,
+            'size': self.size,
+            'content_type': self.content_type,
+            'ref_count': self.ref_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'page_count': self.page_count,
+            'width': self.width,
+            'height': self.height,
+            'has_preview': self.preview_path is not None,
+            'processed_at': self.processed_at.isoformat() if self.processed_at else None
+        }
+
+
+class DocumentJob(db.Model):
+    """Queued background processing for a newly stored document blob"""
+    __tablename__ = 'document_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    status = db.Column(db.Enum('Queued', 'Running', 'Done', 'Failed'), nullable=False, default='Queued', index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker = db.Column(db.String(64))
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'sha256': self.sha256,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -1,7 +1,21 @@
-from flask import Blueprint, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Loan, LoanProduct, AdminBank, PersonalDetails
-from datetime import datetime
+from flask import Blueprint, current_app, request, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from models import db, Loan, LoanProduct, AdminBank, PersonalDetails, UserDocuments, DocumentBlob, DocumentJob, DOCUMENT_TYPES
+from services.auth_state import get_principal
+from services.blobs import blob_store
+from services.db_pool import metrics as pool_metrics
+from services.loan_batch import (
+    BATCH_ACTIONS, DEFAULT_CHUNK_SIZE as BATCH_CHUNK_SIZE, MAX_BATCH_SIZE, apply_batch, parse_loan_ids
+)
+from services.loan_state import InvalidTransition, TransitionConflict, transition
+from services.normalize import get_json_normalized
+from services.pagination import InvalidCursor, paginate_loans, parse_limit, stream_ndjson
+from services.serializers import with_loan_relations, serialize_loans
+from services.stats import (
+    DEFAULT_TREND_DAYS, GRANULARITIES, MAX_TREND_DAYS, application_trend, count_applications, month_range, read_rollup
+)
+from services.user_import import DEFAULT_CHUNK_SIZE, iter_rows, import_users as run_user_import
+from datetime import datetime, date, timedelta
 from functools import wraps
 import logging
 
@@ -12,13 +26,14 @@ def admin_required(f):
     """Decorator to check admin privileges"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Simple admin check - in production, implement proper role-based access control
-        user_id = int(get_jwt_identity())
-        user = PersonalDetails.query.get(user_id)
+        # The role claim rejects non-admins without touching the database;
+        # the cached principal catches role changes and deleted users
+        role = get_jwt().get('role')
+        if role is not None and role != 'admin':
+            return {'error': 'Admin access required'}, 403
         
-        # Check if user is admin (you can add an is_admin field to your User model)
-        # For now, checking by email
-        if not user or user.email != 'admin@loanhub.com':
+        principal = get_principal(int(get_jwt_identity()))
+        if not principal or principal.role != 'admin':
             return {'error': 'Admin access required'}, 403
         
         return f(*args, **kwargs)
@@ -29,10 +44,16 @@ def admin_required(f):
 @jwt_required()
 @admin_required
 def get_all_loans():
-    """Get all loan applications"""
+    """Get loan applications, newest first, one keyset page at a time
+
+    Pass ``format=ndjson`` (or ``Accept: application/x-ndjson``) to stream every
+    matching loan as newline-delimited JSON instead of a single page.
+    """
     try:
         status = request.args.get('status')
         bank_id = request.args.get('bank_id', type=int)
+        cursor = request.args.get('cursor')
+        limit = parse_limit(request.args.get('limit', type=int))
         
         query = Loan.query
         
@@ -42,10 +63,24 @@ def get_all_loans():
         if bank_id:
             query = query.join(LoanProduct).filter(LoanProduct.bank_id == bank_id)
         
-        loans = query.order_by(Loan.application_date.desc()).all()
+        wants_ndjson = request.args.get('format') == 'ndjson' or \
+            request.accept_mimetypes.best == 'application/x-ndjson'
+        if wants_ndjson:
+            return Response(
+                stream_with_context(stream_ndjson(query, Loan, serialize_loans, cursor=cursor)),
+                mimetype='application/x-ndjson'
+            )
+        
+        loans, next_cursor = paginate_loans(with_loan_relations(query), Loan, cursor=cursor, limit=limit)
         
-        return {'loans': [loan.to_dict() for loan in loans]}, 200
+        return {
+            'loans': [loan.to_dict() for loan in loans],
+            'next_cursor': next_cursor,
+            'limit': limit
+        }, 200
         
+    except InvalidCursor as e:
+        return {'error': str(e)}, 400
     except Exception as e:
         logger.error(f"Get all loans error: {str(e)}")
         return {'error': str(e)}, 500
@@ -61,12 +96,7 @@ def approve_loan(loan_id):
         if not loan:
             return {'error': 'Loan not found'}, 404
         
-        if loan.status != 'Pending':
-            return {'error': 'Only pending loans can be approved'}, 400
-        
-        loan.status = 'Approved'
-        loan.approval_date = datetime.utcnow()
-        
+        transition(loan, 'approve')
         db.session.commit()
         
         return {
@@ -74,6 +104,11 @@ def approve_loan(loan_id):
             'loan': loan.to_dict()
         }, 200
         
+    except InvalidTransition as e:
+        return {'error': str(e)}, 400
+    except TransitionConflict as e:
+        db.session.rollback()
+        return {'error': str(e)}, 409
     except Exception as e:
         db.session.rollback()
         logger.error(f"Approve loan error: {str(e)}")
@@ -90,12 +125,7 @@ def reject_loan(loan_id):
         if not loan:
             return {'error': 'Loan not found'}, 404
         
-        if loan.status != 'Pending':
-            return {'error': 'Only pending loans can be rejected'}, 400
-        
-        loan.status = 'Rejected'
-        loan.approval_date = datetime.utcnow()
-        
+        transition(loan, 'reject')
         db.session.commit()
         
         return {
@@ -103,6 +133,11 @@ def reject_loan(loan_id):
             'loan': loan.to_dict()
         }, 200
         
+    except InvalidTransition as e:
+        return {'error': str(e)}, 400
+    except TransitionConflict as e:
+        db.session.rollback()
+        return {'error': str(e)}, 409
     except Exception as e:
         db.session.rollback()
         logger.error(f"Reject loan error: {str(e)}")
@@ -119,12 +154,7 @@ def disburse_loan(loan_id):
         if not loan:
             return {'error': 'Loan not found'}, 404
         
-        if loan.status != 'Approved':
-            return {'error': 'Only approved loans can be disbursed'}, 400
-        
-        loan.status = 'Active'
-        loan.disbursal_date = datetime.utcnow()
-        
+        transition(loan, 'disburse')
         db.session.commit()
         
         return {
@@ -132,12 +162,44 @@ def disburse_loan(loan_id):
             'loan': loan.to_dict()
         }, 200
         
+    except InvalidTransition as e:
+        return {'error': str(e)}, 400
+    except TransitionConflict as e:
+        db.session.rollback()
+        return {'error': str(e)}, 409
     except Exception as e:
         db.session.rollback()
         logger.error(f"Disburse loan error: {str(e)}")
         return {'error': str(e)}, 500
 
 
+@admin_bp.route('/loans/batch/<action>', methods=['POST'])
+@jwt_required()
+@admin_required
+def batch_loan_action(action):
+    """Approve, reject or disburse a list of loans with one conditional UPDATE per chunk"""
+    try:
+        if action not in BATCH_ACTIONS:
+            return {'error': f"action must be one of: {', '.join(BATCH_ACTIONS)}"}, 404
+        
+        chunk_size = request.args.get('chunk_size', BATCH_CHUNK_SIZE, type=int)
+        if not 1 <= chunk_size <= MAX_BATCH_SIZE:
+            return {'error': f'chunk_size must be between 1 and {MAX_BATCH_SIZE}'}, 400
+        
+        data = get_json_normalized()
+        try:
+            loan_ids = parse_loan_ids(data.get('loan_ids'))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        return apply_batch(action, loan_ids, chunk_size=chunk_size), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Batch loan {action} error: {str(e)}")
+        return {'error': str(e)}, 500
+
+
 @admin_bp.route('/statistics', methods=['GET'])
 @jwt_required()
 @admin_required
@@ -147,28 +209,20 @@ def get_statistics():
         # Total users
         total_users = PersonalDetails.query.count()
         
-        # Total loans
-        total_loans = Loan.query.count()
-        
-        # Loans by status
-        pending_loans = Loan.query.filter_by(status='Pending').count()
-        approved_loans = Loan.query.filter_by(status='Approved').count()
-        rejected_loans = Loan.query.filter_by(status='Rejected').count()
-        active_loans = Loan.query.filter_by(status='Active').count()
-        closed_loans = Loan.query.filter_by(status='Closed').count()
+        # Loans by status, read from the incrementally maintained rollup
+        rollup = read_rollup()
+        total_loans = sum(count for count, _ in rollup.values())
+        pending_loans = rollup.get('Pending', (0, 0))[0]
+        approved_loans = rollup.get('Approved', (0, 0))[0]
+        rejected_loans = rollup.get('Rejected', (0, 0))[0]
+        active_loans = rollup.get('Active', (0, 0))[0]
+        closed_loans = rollup.get('Closed', (0, 0))[0]
         
         # Total loan amount
-        from sqlalchemy import func
-        total_loan_amount = db.session.query(func.sum(Loan.loan_amount)).filter_by(status='Active').scalar() or 0
-        
-        # Total applications this month
-        from sqlalchemy import extract
-        current_month = datetime.utcnow().month
-        current_year = datetime.utcnow().year
-        monthly_applications = Loan.query.filter(
-            extract('month', Loan.application_date) == current_month,
-            extract('year', Loan.application_date) == current_year
-        ).count()
+        total_loan_amount = rollup.get('Active', (0, 0))[1]
+        
+        # Total applications this month, as an index-friendly date range
+        monthly_applications = count_applications(*month_range(datetime.utcnow()))
         
         return {
             'total_users': total_users,
@@ -187,6 +241,52 @@ def get_statistics():
         return {'error': str(e)}, 500
 
 
+@admin_bp.route('/statistics/applications', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_application_trend():
+    """Applications per day, week or month over [start, end) from the daily counters"""
+    try:
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in GRANULARITIES:
+            return {'error': f"granularity must be one of: {', '.join(GRANULARITIES)}"}, 400
+        
+        try:
+            end = date.fromisoformat(request.args['end']) if request.args.get('end') else date.today() + timedelta(days=1)
+            start = date.fromisoformat(request.args['start']) if request.args.get('start') else end - timedelta(days=DEFAULT_TREND_DAYS[granularity])
+        except ValueError:
+            return {'error': 'start and end must be dates (YYYY-MM-DD)'}, 400
+        if start >= end:
+            return {'error': 'start must be before end'}, 400
+        if (end - start).days > MAX_TREND_DAYS:
+            return {'error': f'Window cannot exceed {MAX_TREND_DAYS} days'}, 400
+        
+        series = application_trend(start, end, granularity)
+        return {
+            'granularity': granularity,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'total_applications': sum(bucket['applications'] for bucket in series),
+            'series': series
+        }, 200
+        
+    except Exception as e:
+        logger.error(f"Get application trend error: {str(e)}")
+        return {'error': str(e)}, 500
+
+
+@admin_bp.route('/db-pool', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_db_pool_metrics():
+    """Connection pool state, checkout latency and wait-queue counters for this process"""
+    try:
+        return pool_metrics.snapshot(db.engine.pool), 200
+    except Exception as e:
+        logger.error(f"Get pool metrics error: {str(e)}")
+        return {'error': str(e)}, 500
+
+
 @admin_bp.route('/banks', methods=['GET'])
 @jwt_required()
 @admin_required
@@ -212,3 +312,126 @@ def get_all_products():
         logger.error(f"Get products error: {str(e)}")
         return {'error': str(e)}, 500
 
+
+
+@admin_bp.route('/loans/<int:loan_id>/documents', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_loan_documents(loan_id):
+    """List the applicant's documents with processed metadata and preview links"""
+    try:
+        user_id = db.session.query(Loan.user_id).filter(Loan.loan_id == loan_id).scalar()
+        if user_id is None:
+            return {'error': 'Loan not found'}, 404
+        
+        documents = UserDocuments.query.filter_by(user_id=user_id).first()
+        paths = {
+            document_type: getattr(documents, f"{document_type}_path") if documents else None
+            for document_type in DOCUMENT_TYPES
+        }
+        shas = {document_type: blob_store.sha_for_path(path) for document_type, path in paths.items()}
+        wanted = [sha for sha in shas.values() if sha]
+        blobs = {blob.sha256: blob for blob in DocumentBlob.query.filter(DocumentBlob.sha256.in_(wanted))} if wanted else {}
+        jobs = dict(db.session.query(DocumentJob.sha256, DocumentJob.status).filter(
+            DocumentJob.sha256.in_(wanted)
+        ).order_by(DocumentJob.id)) if wanted else {}
+        
+        result = []
+        for document_type, path in paths.items():
+            if not path:
+                continue
+            blob = blobs.get(shas[document_type])
+            entry = blob.to_dict() if blob else {'sha256': None}
+            entry.update({
+                'document_type': document_type,
+                'processing_status': jobs.get(shas[document_type]),
+                'download_url': f'/api/admin/users/{user_id}/documents/{document_type}',
+                'preview_url': f'/api/admin/documents/{blob.sha256}/preview' if blob and blob.preview_path else None
+            })
+            result.append(entry)
+        
+        return {'loan_id': loan_id, 'user_id': user_id, 'documents': result}, 200
+        
+    except Exception as e:
+        logger.error(f"Get loan documents error: {str(e)}")
+        return {'error': str(e)}, 500
+
+
+@admin_bp.route('/documents/<sha256>/preview', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_document_preview(sha256):
+    """Serve the downscaled JPEG preview of a document"""
+    try:
+        response = blob_store.send_preview(sha256)
+        if response is None:
+            return {'error': 'Preview not available'}, 404
+        return response
+    except Exception as e:
+        logger.error(f"Get document preview error: {str(e)}")
+        return {'error': str(e)}, 500
+
+
+@admin_bp.route('/users/<int:user_id>/documents/<document_type>', methods=['GET'])
+@jwt_required()
+@admin_required
+def download_user_document(user_id, document_type):
+    """Download a user's document for KYC review (supports Range and conditional GET)"""
+    try:
+        if document_type not in DOCUMENT_TYPES:
+            return {'error': 'Document not found'}, 404
+        path = db.session.query(getattr(UserDocuments, f"{document_type}_path")).filter(
+            UserDocuments.user_id == user_id
+        ).scalar()
+        response = blob_store.send(path, f'user_{user_id}_{document_type}')
+        if response is None:
+            return {'error': 'Document not found'}, 404
+        return response
+    except Exception as e:
+        logger.error(f"Download document error: {str(e)}")
+        return {'error': str(e)}, 500
+
+
+@admin_bp.route('/users/import', methods=['POST'])
+@jwt_required()
+@admin_required
+def import_users():
+    """Bulk-create users from a CSV or NDJSON upload
+
+    Send the file as multipart field ``file`` or as the raw request body. The
+    format comes from ``format=csv|ndjson``, the file extension or the
+    Content-Type, in that order.
+    """
+    try:
+        upload = request.files.get('file')
+        stream = upload.stream if upload else request.stream
+        filename = (upload.filename or '') if upload else ''
+        content_type = upload.mimetype if upload else request.mimetype
+        
+        fmt = request.args.get('format')
+        if not fmt:
+            if filename.lower().endswith('.csv') or content_type == 'text/csv':
+                fmt = 'csv'
+            elif filename.lower().endswith(('.ndjson', '.jsonl')) or content_type in ('application/x-ndjson', 'application/jsonl'):
+                fmt = 'ndjson'
+        if fmt not in ('csv', 'ndjson'):
+            return {'error': 'Upload format must be csv or ndjson'}, 400
+        
+        # Hashing processes and chunk size are capped so one upload cannot
+        # take over the web host
+        max_workers = current_app.config['USER_IMPORT_MAX_WORKERS']
+        max_chunk_size = current_app.config['USER_IMPORT_MAX_CHUNK_SIZE']
+        workers = request.args.get('workers', max_workers, type=int)
+        chunk_size = request.args.get('chunk_size', DEFAULT_CHUNK_SIZE, type=int)
+        if not 1 <= workers <= max_workers:
+            return {'error': f'workers must be between 1 and {max_workers}'}, 400
+        if not 1 <= chunk_size <= max_chunk_size:
+            return {'error': f'chunk_size must be between 1 and {max_chunk_size}'}, 400
+        
+        report = run_user_import(iter_rows(stream, fmt), chunk_size=chunk_size, workers=workers)
+        return report, 200
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Import users error: {str(e)}")
+        return {'error': str(e)}, 500
@@ -1,41 +1,21 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 # from models import db, User
 from datetime import datetime
-import re
 from models import db, PersonalDetails as User 
+from services.auth_state import issue_token, get_user_snapshot, revoke_token, revoke_user_tokens
+from services.normalize import get_json_normalized, validate_email, validate_password
+from services.passwords import HashingBusy
 
 
 
-def camel_to_snake(name: str) -> str:
-    return re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()
-
-def normalize_keys(d: dict) -> dict:
-    if not isinstance(d, dict):
-        return d
-    return {camel_to_snake(k): normalize_keys(v) if isinstance(v, dict) else v for k, v in d.items()}
-
 auth_bp = Blueprint('auth', __name__)
 
-def validate_email(email):
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
-
-def validate_password(password):
-    # Password must be at least 8 characters with at least one letter and one number
-    if len(password) < 8:
-        return False
-    if not re.search(r'[A-Za-z]', password):
-        return False
-    if not re.search(r'\d', password):
-        return False
-    return True
-
 @auth_bp.route('/register', methods=['POST'])
 def register():
     try:
         # data = request.get_json()
-        data = normalize_keys(request.get_json() or {})
+        data = get_json_normalized()
         # Validate required fields
         # required_fields = ['full_name', 'email', 'contact_number', 'password']
         # for field in required_fields:
@@ -77,7 +57,7 @@ def register():
         db.session.commit()
         
         # Create access token
-        access_token = create_access_token(identity=user.user_id)
+        access_token = issue_token(user)
         
         return jsonify({
             'message': 'User registered successfully',
@@ -87,6 +67,9 @@ def register():
         
     except ValueError as e:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    except HashingBusy as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -94,7 +77,7 @@ def register():
 @auth_bp.route('/login', methods=['POST'])
 def login():
     try:
-        data = request.get_json()
+        data = get_json_normalized()
         
         if not data.get('email') or not data.get('password'):
             return jsonify({'error': 'Email and password are required'}), 400
@@ -105,8 +88,13 @@ def login():
         if not user or not user.check_password(data['password']):
             return jsonify({'error': 'Invalid email or password'}), 401
         
+        # Upgrade the stored hash when the configured hashing parameters changed
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+        
         # Create access token
-        access_token = create_access_token(identity=user.user_id)
+        access_token = issue_token(user)
         
         return jsonify({
             'message': 'Login successful',
@@ -114,21 +102,23 @@ def login():
             'user': user.to_dict()
         }), 200
         
+    except HashingBusy as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = get_user_snapshot(int(get_jwt_identity()))
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
         return jsonify({
-            'user': user.to_dict()
+            'user': user
         }), 200
         
     except Exception as e:
@@ -139,7 +129,7 @@ def get_profile():
 def change_password():
     try:
         user_id = get_jwt_identity()
-        data = request.get_json()
+        data = get_json_normalized()
         
         if not data.get('current_password') or not data.get('new_password'):
             return jsonify({'error': 'Current password and new password are required'}), 400
@@ -156,12 +146,19 @@ def change_password():
         if not validate_password(data['new_password']):
             return jsonify({'error': 'New password must be at least 8 characters with at least one letter and one number'}), 400
         
-        # Update password
+        # Update password and revoke tokens issued with the old one
         user.set_password(data['new_password'])
+        revoke_user_tokens(user.user_id)
         db.session.commit()
         
-        return jsonify({'message': 'Password changed successfully'}), 200
+        return jsonify({
+            'message': 'Password changed successfully',
+            'access_token': issue_token(user)
+        }), 200
         
+    except HashingBusy as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -170,17 +167,29 @@ def change_password():
 @jwt_required()
 def verify_token():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        # Signature, expiry and the revocation denylist are already checked by
+        # jwt_required; the user comes from the per-user snapshot cache
+        user = get_user_snapshot(int(get_jwt_identity()))
         
         if not user:
             return jsonify({'error': 'Invalid token'}), 401
         
         return jsonify({
             'valid': True,
-            'user': user.to_dict()
+            'user': user
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    try:
+        revoke_token(get_jwt())
+        db.session.commit()
+        return jsonify({'message': 'Logged out successfully'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
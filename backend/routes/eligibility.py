@@ -1,7 +1,9 @@
-from flask import Blueprint, request
+from flask import Blueprint
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, PersonalDetails, FinancialDetails, EmploymentDetails, LoanProduct, Loan
-from datetime import datetime
+from services.catalog import catalog
+from services.eligibility import load_applicant, assess_applicant, product_verdict
+from services.emi import EMIInputError, annuity_factor, check_batch_size, grid, quote_batch
+from services.normalize import get_json_normalized
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,93 +16,24 @@ def check_eligibility():
     """Check loan eligibility"""
     try:
         user_id = int(get_jwt_identity())
-        data = request.get_json()
+        data = get_json_normalized()
         
         if not data.get('loan_product_id'):
             return {'error': 'loan_product_id is required'}, 400
         
         # Get user and related data
-        user = PersonalDetails.query.get(user_id)
-        financial_info = FinancialDetails.query.filter_by(user_id=user_id).first()
-        employment_info = EmploymentDetails.query.filter_by(user_id=user_id).first()
-        
-        if not financial_info or not employment_info:
+        applicant = load_applicant(user_id)
+        if not applicant:
             return {'error': 'Financial and employment information required'}, 400
         
         # Get loan product
-        loan_product = LoanProduct.query.get(data['loan_product_id'])
+        loan_product = catalog.get_product(data['loan_product_id'])
         if not loan_product:
             return {'error': 'Loan product not found'}, 404
         
-        # Eligibility criteria
-        eligibility_results = {
-            'eligible': True,
-            'reasons': [],
-            'recommendations': [],
-            'maximum_eligible_amount': None
-        }
-        
-        # Check age
-        if user.date_of_birth:
-            age = (datetime.now().date() - user.date_of_birth).days // 365
-            if age < 21:
-                eligibility_results['eligible'] = False
-                eligibility_results['reasons'].append('Minimum age requirement not met (21 years)')
-        
-        # Check employment status
-        if employment_info.employment_status in ['Unemployed', 'Student']:
-            if employment_info.employment_status == 'Student':
-                total_income = float(employment_info.monthly_income or 0) + float(employment_info.other_income or 0)
-                if total_income < 10000:  # 10k per month minimum
-                    eligibility_results['eligible'] = False
-                    eligibility_results['reasons'].append('Minimum monthly income not met')
-            else:
-                eligibility_results['eligible'] = False
-                eligibility_results['reasons'].append('Unemployed applicants are not eligible')
-        
-        # Check monthly income
-        total_monthly_income = float(employment_info.monthly_income or 0) + float(employment_info.other_income or 0)
-        if total_monthly_income < 20000:  # 20k per month minimum
-            eligibility_results['eligible'] = False
-            eligibility_results['reasons'].append('Monthly income below minimum requirement (₹20,000)')
-            eligibility_results['recommendations'].append('Increase your monthly income')
-        
-        # Check existing loans and debt-to-income ratio
-        existing_loans = float(financial_info.existing_loans or 0)
-        monthly_emi = float(financial_info.monthly_emi or 0)
-        
-        if total_monthly_income > 0:
-            debt_to_income_ratio = (monthly_emi / total_monthly_income) * 100
-            if debt_to_income_ratio > 40:  # 40% threshold
-                eligibility_results['eligible'] = False
-                eligibility_results['reasons'].append(f'Debt-to-income ratio too high ({debt_to_income_ratio:.1f}%)')
-                eligibility_results['recommendations'].append('Reduce existing debt')
-        
-        # Check active loans count
-        active_loans = Loan.query.filter_by(user_id=user_id, status='Active').count()
-        if active_loans >= 3:
-            eligibility_results['eligible'] = False
-            eligibility_results['reasons'].append('Maximum number of active loans reached (3)')
-        
-        # Calculate recommended loan amount
-        if eligibility_results['eligible'] and total_monthly_income > 0:
-            # Maximum EMI should be 40% of monthly income
-            max_monthly_emi = (total_monthly_income - monthly_emi) * 0.4
-            if max_monthly_emi > 0:
-                # Calculate maximum loan amount based on EMI
-                monthly_rate = loan_product.interest_rate / (12 * 100)
-                loan_amount = data.get('loan_amount', loan_product.min_amount)
-                tenure_months = data.get('tenure_months', 12)
-                
-                if tenure_months > 0 and monthly_rate > 0:
-                    max_loan_amount = (max_monthly_emi * ((1 + monthly_rate) ** tenure_months - 1)) / \
-                                      (monthly_rate * (1 + monthly_rate) ** tenure_months)
-                    eligibility_results['maximum_eligible_amount'] = min(
-                        max_loan_amount,
-                        float(loan_product.max_amount)
-                    )
-        
-        eligibility_results['loan_product'] = loan_product.to_dict()
+        tenure_months = int(data.get('tenure_months', 12))
+        eligibility_results = product_verdict(assess_applicant(applicant), applicant, loan_product, tenure_months)
+        eligibility_results['loan_product'] = loan_product
         
         return eligibility_results, 200
         
@@ -109,11 +42,62 @@ def check_eligibility():
         return {'error': str(e)}, 500
 
 
+@eligibility_bp.route('/check-bulk', methods=['POST'])
+@jwt_required()
+def check_eligibility_bulk():
+    """Check eligibility against every loan product (or a filtered subset) in one call"""
+    try:
+        user_id = int(get_jwt_identity())
+        data = get_json_normalized()
+        
+        applicant = load_applicant(user_id)
+        if not applicant:
+            return {'error': 'Financial and employment information required'}, 400
+        
+        bank_id = data.get('bank_id')
+        if bank_id is not None:
+            try:
+                bank_id = int(bank_id)
+            except (TypeError, ValueError):
+                return {'error': 'bank_id must be an integer'}, 400
+        
+        loan_products = catalog.get_products(
+            bank_id=bank_id,
+            amount=float(data['loan_amount']) if data.get('loan_amount') else None
+        )
+        if data.get('loan_product_ids'):
+            wanted = {int(product_id) for product_id in data['loan_product_ids']}
+            loan_products = [product for product in loan_products if product['loan_product_id'] in wanted]
+        
+        tenure_months = int(data.get('tenure_months', 12))
+        assessment = assess_applicant(applicant)
+        results = []
+        for loan_product in loan_products:
+            verdict = product_verdict(assessment, applicant, loan_product, tenure_months)
+            verdict['loan_product_id'] = loan_product['loan_product_id']
+            verdict['product_name'] = loan_product['product_name']
+            verdict['bank_name'] = loan_product['bank_name']
+            results.append(verdict)
+        
+        return {
+            'eligible': assessment['eligible'],
+            'reasons': assessment['reasons'],
+            'recommendations': assessment['recommendations'],
+            'results': results
+        }, 200
+        
+    except (TypeError, ValueError) as e:
+        return {'error': f'Invalid request: {str(e)}'}, 400
+    except Exception as e:
+        logger.error(f"Check eligibility bulk error: {str(e)}")
+        return {'error': str(e)}, 500
+
+
 @eligibility_bp.route('/calculate-emi', methods=['POST'])
 def calculate_emi():
     """Calculate EMI for given loan parameters"""
     try:
-        data = request.get_json()
+        data = get_json_normalized()
         
         required_fields = ['loan_amount', 'interest_rate', 'tenure_months']
         for field in required_fields:
@@ -124,14 +108,7 @@ def calculate_emi():
         interest_rate = float(data['interest_rate'])
         tenure_months = int(data['tenure_months'])
         
-        # Calculate EMI using the formula
-        monthly_rate = interest_rate / (12 * 100)
-        
-        if monthly_rate == 0:
-            emi = loan_amount / tenure_months
-        else:
-            emi = (loan_amount * monthly_rate * (1 + monthly_rate) ** tenure_months) / \
-                  ((1 + monthly_rate) ** tenure_months - 1)
+        emi = loan_amount / annuity_factor(interest_rate, tenure_months)
         
         total_amount = emi * tenure_months
         total_interest = total_amount - loan_amount
@@ -150,7 +127,36 @@ def calculate_emi():
         return {'error': str(e)}, 500
 
 
+@eligibility_bp.route('/calculate-emi/batch', methods=['POST'])
+def calculate_emi_batch():
+    """Calculate EMI for many loan parameter combinations at once
 
-
-
-
+    Accepts either ``loan_amounts``/``interest_rates``/``tenure_months`` lists
+    (expanded to their full grid) or a ``quotes`` list of individual
+    combinations. Results are returned column by column.
+    """
+    try:
+        data = get_json_normalized()
+        
+        if data.get('quotes'):
+            quotes = data['quotes']
+            if not isinstance(quotes, list):
+                return {'error': 'quotes must be a list'}, 400
+            check_batch_size(len(quotes))
+            amounts = [float(q['loan_amount']) for q in quotes]
+            rates = [float(q['interest_rate']) for q in quotes]
+            tenures = [int(q['tenure_months']) for q in quotes]
+        else:
+            required_fields = ['loan_amounts', 'interest_rates', 'tenure_months']
+            for field in required_fields:
+                if not data.get(field):
+                    return {'error': f'{field} is required'}, 400
+            amounts, rates, tenures = grid(data['loan_amounts'], data['interest_rates'], data['tenure_months'])
+        
+        return quote_batch(amounts, rates, tenures, include_schedule=bool(data.get('include_schedule'))), 200
+        
+    except (EMIInputError, KeyError, TypeError, ValueError, OverflowError) as e:
+        return {'error': f'Invalid batch request: {str(e)}'}, 400
+    except Exception as e:
+        logger.error(f"Calculate EMI batch error: {str(e)}")
+        return {'error': str(e)}, 500
@@ -1,8 +1,15 @@
 from flask import Blueprint, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Loan, LoanProduct, PersonalDetails, FinancialDetails, EmploymentDetails
-from datetime import datetime
 from decimal import Decimal
+from sqlalchemy.exc import IntegrityError
+from services.catalog import catalog
+from services.emi import annuity_factor
+from services.idempotency import MAX_KEY_LENGTH, IdempotencyKeyReused, fingerprint, idempotency_keys
+from services.loan_state import InvalidTransition, TransitionConflict, transition
+from services.normalize import get_json_normalized
+from services.serializers import with_loan_relations
+from services.stats import record_application, record_transition
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,21 +23,13 @@ def get_loan_products():
         bank_id = request.args.get('bank_id', type=int)
         min_amount = request.args.get('min_amount', type=float)
         max_amount = request.args.get('max_amount', type=float)
+        amount = request.args.get('amount', type=float)
         
-        query = LoanProduct.query
-        
-        if bank_id:
-            query = query.filter_by(bank_id=bank_id)
-        
-        if min_amount:
-            query = query.filter(LoanProduct.max_amount >= min_amount)
-        
-        if max_amount:
-            query = query.filter(LoanProduct.min_amount <= max_amount)
-        
-        loan_products = query.all()
+        loan_products = catalog.get_products(
+            bank_id=bank_id, min_amount=min_amount, max_amount=max_amount, amount=amount
+        )
         
-        return {'loan_products': [product.to_dict() for product in loan_products]}, 200
+        return {'loan_products': loan_products}, 200
         
     except Exception as e:
         logger.error(f"Get loan products error: {str(e)}")
@@ -41,12 +40,12 @@ def get_loan_products():
 def get_loan_product(product_id):
     """Get specific loan product details"""
     try:
-        loan_product = LoanProduct.query.get(product_id)
+        loan_product = catalog.get_product(product_id)
         
         if not loan_product:
             return {'error': 'Loan product not found'}, 404
         
-        return {'loan_product': loan_product.to_dict()}, 200
+        return {'loan_product': loan_product}, 200
         
     except Exception as e:
         logger.error(f"Get loan product error: {str(e)}")
@@ -56,10 +55,24 @@ def get_loan_product(product_id):
 @loans_bp.route('/apply', methods=['POST'])
 @jwt_required()
 def apply_for_loan():
-    """Apply for a loan"""
+    """Apply for a loan
+
+    Clients may send an ``Idempotency-Key`` header; a retry with the same key
+    and body gets the original response back without creating another loan.
+    """
     try:
         user_id = int(get_jwt_identity())
-        data = request.get_json()
+        data = get_json_normalized()
+        
+        # Replay a stored response before doing any work
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key is not None:
+            if not 0 < len(idempotency_key) <= MAX_KEY_LENGTH:
+                return {'error': f'Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters'}, 400
+            request_hash = fingerprint(data)
+            replay = idempotency_keys.lookup(user_id, idempotency_key, request_hash)
+            if replay:
+                return (*replay, {'Idempotent-Replayed': 'true'})
         
         # Validate required fields
         required_fields = ['loan_product_id', 'loan_amount', 'tenure_months']
@@ -79,20 +92,9 @@ def apply_for_loan():
                 'error': f'Loan amount must be between {loan_product.min_amount} and {loan_product.max_amount}'
             }, 400
         
-        # Check if user already has a pending application for this product
-        existing_loan = Loan.query.filter_by(
-            user_id=user_id,
-            loan_product_id=data['loan_product_id'],
-            status='Pending'
-        ).first()
-        
-        if existing_loan:
-            return {'error': 'You already have a pending application for this loan product'}, 400
-        
         # Calculate EMI
-        monthly_rate = loan_product.interest_rate / (12 * 100)
-        emi = (loan_amount * monthly_rate * (1 + monthly_rate) ** data['tenure_months']) / \
-              ((1 + monthly_rate) ** data['tenure_months'] - 1)
+        factor = annuity_factor(loan_product.interest_rate, int(data['tenure_months']))
+        emi = Decimal(str(round(float(loan_amount) / factor, 2)))
         
         # Create new loan application
         loan = Loan(
@@ -105,14 +107,41 @@ def apply_for_loan():
             status='Pending'
         )
         
-        db.session.add(loan)
+        # One pending application per product is enforced by uq_loans_user_product_pending,
+        # so concurrent submissions cannot both get past a SELECT check
+        try:
+            db.session.add(loan)
+            db.session.flush()
+            response = {
+                'message': 'Loan application submitted successfully',
+                'loan': loan.to_dict()
+            }
+            if idempotency_key is not None:
+                idempotency_keys.save(user_id, idempotency_key, request_hash, response, 201)
+        except IntegrityError:
+            db.session.rollback()
+            # A concurrent retry with the same key may have won the race
+            if idempotency_key is not None:
+                replay = idempotency_keys.lookup(user_id, idempotency_key, request_hash)
+                if replay:
+                    return (*replay, {'Idempotent-Replayed': 'true'})
+            # Only a pending loan that now exists explains the error; anything
+            # else (foreign keys, NOT NULL, ...) is a real failure
+            pending = db.session.query(Loan.loan_id).filter_by(
+                user_id=user_id, loan_product_id=loan_product.loan_product_id, status='Pending'
+            ).first()
+            if pending is None:
+                raise
+            return {'error': 'You already have a pending application for this loan product'}, 400
+        
+        record_transition(None, 'Pending', loan_amount)
+        record_application(loan_amount)
         db.session.commit()
         
-        return {
-            'message': 'Loan application submitted successfully',
-            'loan': loan.to_dict()
-        }, 201
+        return response, 201
         
+    except IdempotencyKeyReused as e:
+        return {'error': str(e)}, 422
     except Exception as e:
         db.session.rollback()
         logger.error(f"Apply for loan error: {str(e)}")
@@ -132,7 +161,7 @@ def get_user_loans():
         if status:
             query = query.filter_by(status=status)
         
-        loans = query.order_by(Loan.application_date.desc()).all()
+        loans = with_loan_relations(query).order_by(Loan.application_date.desc()).all()
         
         return {'loans': [loan.to_dict() for loan in loans]}, 200
         
@@ -170,12 +199,7 @@ def pre_close_loan(loan_id):
         if not loan:
             return {'error': 'Loan not found'}, 404
         
-        if loan.status not in ['Active', 'Approved']:
-            return {'error': 'Only active or approved loans can be pre-closed'}, 400
-        
-        loan.status = 'Closed'
-        loan.pre_closure_date = datetime.utcnow()
-        
+        transition(loan, 'pre_close')
         db.session.commit()
         
         return {
@@ -183,6 +207,11 @@ def pre_close_loan(loan_id):
             'loan': loan.to_dict()
         }, 200
         
+    except InvalidTransition as e:
+        return {'error': str(e)}, 400
+    except TransitionConflict as e:
+        db.session.rollback()
+        return {'error': str(e)}, 409
     except Exception as e:
         db.session.rollback()
         logger.error(f"Pre-close loan error: {str(e)}")
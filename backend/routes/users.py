@@ -1,17 +1,22 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, PersonalDetails, FinancialDetails, EmploymentDetails, UserDocuments
+from models import db, PersonalDetails, FinancialDetails, EmploymentDetails, UserDocuments, DOCUMENT_TYPES
 from datetime import datetime
-import os
-from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.formparser import FormDataParser
+from services.blobs import blob_store
+from services.normalize import get_json_normalized
+from services.profile import load_profile, parse_fields, profile_etag, serialize_profile
 import logging
 
+logger = logging.getLogger(__name__)
 users_bp = Blueprint('users', __name__)
 
-# Configure file upload
-UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploads')
+# Configure file upload (stored under app.config['UPLOAD_FOLDER'] by services.blobs)
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg'}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+# Room for multipart boundaries and the small form fields sent with the file
+MULTIPART_OVERHEAD = 64 * 1024
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -19,24 +24,30 @@ def allowed_file(filename):
 
 # ------------------ USER PROFILE ------------------
 
-@users_bp.route('/profile', methods=['GET','PUT'])
+@users_bp.route('/profile', methods=['GET'])
 @jwt_required()
 def get_user_profile():
+    """Get the full profile in one query, optionally projected with ``fields=``
+
+    Responses carry an ETag built from the rows' updated_at columns, so a
+    matching If-None-Match gets a 304 without serializing anything.
+    """
     try:
         user_id = int(get_jwt_identity())
-        user = PersonalDetails.query.get(user_id)
+        fields = parse_fields(request.args.get('fields'))
+        user, related = load_profile(user_id, fields)
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
-        profile_data = user.to_dict()
-        if user.financial_details:
-            profile_data['financial_details'] = user.financial_details.to_dict()
-        if user.employment_details:
-            profile_data['employment_details'] = user.employment_details.to_dict()
-        if user.user_documents:
-            profile_data['user_documents'] = user.user_documents.to_dict()
-
-        return jsonify({'profile': profile_data}), 200
+        etag = profile_etag(user, related, fields)
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = jsonify({'profile': serialize_profile(user, related, fields)})
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
 
     except Exception as e:
         logger.error(f"Get profile error: {str(e)}")
@@ -52,7 +63,7 @@ def update_user_profile():
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
-        data = request.get_json()
+        data = get_json_normalized()
         print("Received data:", data)
 
         # Update all required fields safely
@@ -85,7 +96,7 @@ def update_user_profile():
 
 # ------------------ FINANCIAL DETAILS ------------------
 
-@users_bp.route('/financial-details', methods=['GET','PUT'])
+@users_bp.route('/financial-details', methods=['GET'])
 @jwt_required()
 def get_financial_details():
     try:
@@ -104,7 +115,7 @@ def get_financial_details():
 def create_financial_details():
     try:
         user_id = int(get_jwt_identity())
-        data = request.get_json()
+        data = get_json_normalized()
         existing = FinancialDetails.query.filter_by(user_id=user_id).first()
         if existing:
             return jsonify({'error': 'Financial details already exist. Use PUT to update.'}), 400
@@ -134,7 +145,7 @@ def update_financial_details():
         if not details:
             return jsonify({'error': 'Financial details not found'}), 404
 
-        data = request.get_json()
+        data = get_json_normalized()
         details.existing_loans = data.get('existing_loans', details.existing_loans)
         details.monthly_emi = data.get('monthly_emi', details.monthly_emi)
         details.assets_owned = data.get('assets_owned', details.assets_owned)
@@ -150,7 +161,7 @@ def update_financial_details():
 
 # ------------------ EMPLOYMENT DETAILS ------------------
 
-@users_bp.route('/employment-details', methods=['GET','PUT'])
+@users_bp.route('/employment-details', methods=['GET'])
 @jwt_required()
 def get_employment_details():
     try:
@@ -169,7 +180,7 @@ def get_employment_details():
 def create_employment_details():
     try:
         user_id = int(get_jwt_identity())
-        data = request.get_json()
+        data = get_json_normalized()
         existing = EmploymentDetails.query.filter_by(user_id=user_id).first()
         if existing:
             return jsonify({'error': 'Employment details already exist. Use PUT to update.'}), 400
@@ -201,7 +212,7 @@ def update_employment_details():
         if not details:
             return jsonify({'error': 'Employment details not found'}), 404
 
-        data = request.get_json()
+        data = get_json_normalized()
         details.employment_status = data.get('employment_status', details.employment_status)
         details.employer_name_address = data.get('employer_name_address', details.employer_name_address)
         details.job_title = data.get('job_title', details.job_title)
@@ -219,7 +230,7 @@ def update_employment_details():
 
 # ------------------ USER DOCUMENTS ------------------
 
-@users_bp.route('/documents', methods=['GET','PUT'])
+@users_bp.route('/documents', methods=['GET'])
 @jwt_required()
 def get_user_documents():
     try:
@@ -233,44 +244,102 @@ def get_user_documents():
         return jsonify({'error': str(e)}), 500
 
 
+@users_bp.route('/documents/<document_type>', methods=['GET'])
+@jwt_required()
+def download_document(document_type):
+    """Download one of the current user's documents (supports Range and conditional GET)"""
+    try:
+        if document_type not in DOCUMENT_TYPES:
+            return jsonify({'error': 'Document not found'}), 404
+        user_id = int(get_jwt_identity())
+        path = db.session.query(getattr(UserDocuments, f"{document_type}_path")).filter(
+            UserDocuments.user_id == user_id
+        ).scalar()
+        response = blob_store.send(path, document_type)
+        if response is None:
+            return jsonify({'error': 'Document not found'}), 404
+        return response
+    except Exception as e:
+        logger.error(f"Download document error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
 @users_bp.route('/upload-document', methods=['POST'])
 @jwt_required()
 def upload_document():
+    """Upload a KYC document, streamed to disk into the content-addressed blob store
+
+    Accepts multipart/form-data (``file`` and ``document_type``) or the raw
+    file as the request body with ``document_type`` and ``filename`` query
+    parameters.
+    """
+    writers = []
+
+    def stream_factory(total_content_length, content_type, filename, content_length=None):
+        writer = blob_store.writer(MAX_FILE_SIZE)
+        writers.append(writer)
+        return writer
+
     try:
         user_id = int(get_jwt_identity())
-        if 'file' not in request.files:
-            return jsonify({'error': 'No file provided'}), 400
-
-        file = request.files['file']
-        document_type = request.form.get('document_type')
+        if request.content_length is not None and request.content_length > MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+            return jsonify({'error': 'File exceeds the 5MB limit'}), 413
+
+        if request.mimetype == 'multipart/form-data':
+            parser = FormDataParser(stream_factory=stream_factory, max_form_memory_size=MAX_FILE_SIZE + MULTIPART_OVERHEAD)
+            _, form, files = parser.parse(
+                request.stream, request.mimetype, request.content_length, request.mimetype_params
+            )
+            if 'file' not in files:
+                return jsonify({'error': 'No file provided'}), 400
+            file = files['file']
+            document_type = form.get('document_type')
+            filename, content_type = file.filename, file.mimetype
+        else:
+            file = None
+            document_type = request.args.get('document_type')
+            filename, content_type = request.args.get('filename', ''), request.mimetype
 
         if not document_type:
             return jsonify({'error': 'Document type is required'}), 400
-        if file.filename == '':
+        if document_type not in DOCUMENT_TYPES:
+            return jsonify({'error': f"Document type must be one of {', '.join(DOCUMENT_TYPES)}"}), 400
+        if filename == '':
             return jsonify({'error': 'No file selected'}), 400
-        if not allowed_file(file.filename):
+        if not allowed_file(filename):
             return jsonify({'error': 'File type not allowed'}), 400
 
-        user_upload_dir = os.path.join(UPLOAD_FOLDER, f'user_{user_id}')
-        os.makedirs(user_upload_dir, exist_ok=True)
-
-        filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{document_type}_{timestamp}_{filename}"
-        file_path = os.path.join(user_upload_dir, filename)
-
-        file.save(file_path)
+        if file is not None:
+            writer = file.stream
+        else:
+            writer = stream_factory(request.content_length, content_type, filename)
+            writer.copy_from(request.stream)
 
         documents = UserDocuments.query.filter_by(user_id=user_id).first()
         if not documents:
             documents = UserDocuments(user_id=user_id)
             db.session.add(documents)
 
+        previous_path = getattr(documents, f"{document_type}_path")
+        file_path = blob_store.acquire(writer, content_type)
         setattr(documents, f"{document_type}_path", file_path)
+        documents.uploaded_at = datetime.utcnow()
+        blob_store.release(previous_path)
         db.session.commit()
-        return jsonify({'message': 'Document uploaded', 'documents': documents.to_dict()}), 200
-
+        return jsonify({
+            'message': 'Document uploaded',
+            'documents': documents.to_dict(),
+            'sha256': writer.sha256,
+            'size': writer.size
+        }), 200
+
+    except RequestEntityTooLarge:
+        db.session.rollback()
+        return jsonify({'error': 'File exceeds the 5MB limit'}), 413
     except Exception as e:
         db.session.rollback()
         logger.error(f"Upload document error: {str(e)}")
         return jsonify({'error': str(e)}), 500
+    finally:
+        for writer in writers:
+            writer.discard()
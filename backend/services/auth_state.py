@@ -0,0 +1,156 @@
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import and_, event, inspect, update
+from sqlalchemy.orm import Session
+
+from models import db, PersonalDetails, RevokedToken
+from services.cache import LRUCache
+
+# Simple admin check - in production, implement proper role-based access control
+ADMIN_EMAIL = 'admin@loanhub.com'
+PRINCIPAL_TTL = 60
+SNAPSHOT_TTL = 300
+
+Principal = namedtuple('Principal', ['user_id', 'role'])
+
+_principals = LRUCache(maxsize=10000, ttl=PRINCIPAL_TTL)
+_snapshots = LRUCache(maxsize=10000, ttl=SNAPSHOT_TTL)
+_token_lifetime = 24 * 3600
+
+
+def init_app(app, jwt):
+    global _token_lifetime
+    lifetime = app.config.get('JWT_ACCESS_TOKEN_EXPIRES')
+    if lifetime:
+        _token_lifetime = int(lifetime.total_seconds())
+    jwt.token_in_blocklist_loader(is_token_revoked)
+
+
+def role_for(user):
+    return 'admin' if user.email == ADMIN_EMAIL else 'user'
+
+
+def issue_token(user):
+    """Create an access token carrying the user's role and sub-second issue time as claims
+
+    ``iat`` only has one-second resolution; ``issued_at`` lets a token issued
+    just after revoke_user_tokens (e.g. by change-password) stay valid.
+    """
+    return create_access_token(
+        identity=str(user.user_id), additional_claims={'role': role_for(user), 'issued_at': time.time()}
+    )
+
+
+def get_principal(user_id):
+    """Role state for ``user_id``, from a short TTL cache (None if the user is gone)
+
+    Misses cost one narrow SELECT; changes to the user row invalidate the
+    entry on commit, so the TTL only bounds staleness from other processes.
+    """
+    principal = _principals.get(user_id)
+    if principal is None:
+        row = db.session.query(PersonalDetails.user_id, PersonalDetails.email).filter(
+            PersonalDetails.user_id == user_id
+        ).first()
+        principal = Principal(user_id, role_for(row)) if row else False
+        _principals.set(user_id, principal)
+    return principal or None
+
+
+def invalidate_principal(user_id):
+    _principals.delete(user_id)
+
+
+def get_user_snapshot(user_id):
+    """Cached PersonalDetails.to_dict() for ``user_id`` (None if the user is gone)"""
+    snapshot = _snapshots.get(user_id)
+    if snapshot is None:
+        user = db.session.get(PersonalDetails, user_id)
+        snapshot = user.to_dict() if user else False
+        _snapshots.set(user_id, snapshot)
+    return snapshot or None
+
+
+def revoke_token(jwt_payload):
+    """Revoke one token in the caller's transaction, until its own expiry
+
+    Stored in ``revoked_tokens`` so every worker process sees it.
+    """
+    db.session.merge(RevokedToken(
+        jti=jwt_payload['jti'], user_id=int(jwt_payload['sub']),
+        expires_at=datetime.utcfromtimestamp(jwt_payload['exp']) if 'exp' in jwt_payload
+        else datetime.utcfromtimestamp(time.time() + _token_lifetime)
+    ))
+
+
+def revoke_user_tokens(user_id):
+    """Revoke every token issued to ``user_id`` up to now, in the caller's transaction"""
+    db.session.execute(
+        update(PersonalDetails).where(PersonalDetails.user_id == user_id).values(tokens_revoked_at=datetime.utcnow())
+    )
+
+
+def purge_revoked_tokens():
+    """Delete revocations of tokens that have expired; returns the number removed"""
+    removed = RevokedToken.query.filter(
+        RevokedToken.expires_at <= datetime.utcnow()
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
+
+def is_token_revoked(jwt_header, jwt_payload):
+    """Denylist check registered with flask-jwt-extended
+
+    One primary-key lookup covers both the logged-out token
+    (``revoked_tokens``) and the user's ``tokens_revoked_at`` cutoff, so
+    every worker process sees revocations as soon as they commit. Tokens of
+    deleted users are rejected too.
+
+    Tokens without an ``issued_at`` claim fall back to the whole-second
+    ``iat`` and are treated as revoked when issued in the revoking second.
+    """
+    row = db.session.query(PersonalDetails.tokens_revoked_at, RevokedToken.jti).outerjoin(
+        RevokedToken, and_(RevokedToken.jti == jwt_payload.get('jti'), RevokedToken.user_id == PersonalDetails.user_id)
+    ).filter(PersonalDetails.user_id == int(jwt_payload['sub'])).first()
+    if row is None or row.jti is not None:
+        return True
+    if row.tokens_revoked_at is None:
+        return False
+    cutoff = row.tokens_revoked_at.replace(tzinfo=timezone.utc).timestamp()
+    return jwt_payload.get('issued_at', jwt_payload.get('iat', 0)) <= cutoff
+
+
+@event.listens_for(Session, 'before_flush')
+def _revoke_tokens_on_role_change(session, flush_context, instances):
+    # Existing tokens carry the old role claim
+    for obj in session.dirty:
+        if isinstance(obj, PersonalDetails):
+            history = inspect(obj).attrs.email.history
+            if history.deleted and (history.deleted[0] == ADMIN_EMAIL) != (obj.email == ADMIN_EMAIL):
+                obj.tokens_revoked_at = datetime.utcnow()
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_principal_changes(session, flush_context):
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, PersonalDetails):
+            stale = session.info.setdefault('stale_users', {})
+            role_changed = obj in session.deleted or inspect(obj).attrs.email.history.has_changes()
+            stale[obj.user_id] = stale.get(obj.user_id, False) or role_changed
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_principals(session):
+    for user_id, role_changed in session.info.pop('stale_users', {}).items():
+        _snapshots.delete(user_id)
+        if role_changed:
+            invalidate_principal(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_principal_changes(session):
+    session.info.pop('stale_users', None)
@@ -0,0 +1,223 @@
+import hashlib
+import mimetypes
+import os
+import tempfile
+
+from sqlalchemy import delete, event, update
+from sqlalchemy.exc import IntegrityError
+from flask import send_file
+from sqlalchemy.orm import Session
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from models import db, DocumentBlob, DocumentJob
+
+CHUNK_SIZE = 64 * 1024
+
+
+class FileTooLarge(RequestEntityTooLarge):
+    """Raised as soon as an upload grows past the size limit"""
+
+
+class BlobWriter:
+    """Writable temp file under the blob store that hashes and counts as it goes
+
+    Used both as a werkzeug multipart ``stream_factory`` target and for raw
+    request bodies, so uploads go to disk chunk by chunk without being
+    buffered in memory or copied a second time.
+    """
+
+    def __init__(self, tmp_dir, max_size):
+        fd, self.temp_path = tempfile.mkstemp(dir=tmp_dir, suffix='.part')
+        self.file = os.fdopen(fd, 'w+b')
+        self.max_size = max_size
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+
+    @property
+    def sha256(self):
+        return self._sha256.hexdigest()
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise FileTooLarge(f'File exceeds the {self.max_size // (1024 * 1024)}MB limit')
+        self._sha256.update(data)
+        return self.file.write(data)
+
+    def copy_from(self, stream, chunk_size=CHUNK_SIZE):
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            self.write(chunk)
+
+    def seek(self, *args):
+        return self.file.seek(*args)
+
+    def tell(self):
+        return self.file.tell()
+
+    def read(self, *args):
+        return self.file.read(*args)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+class BlobStore:
+    """Content-addressed, reference-counted file storage under ``uploads/blobs``
+
+    Each distinct file is kept once at ``blobs/<sha[:2]>/<sha256>`` with a
+    DocumentBlob row counting the documents that point at it, so re-uploads of
+    the same scan (by the same or another user) cost no extra disk.
+    """
+
+    def __init__(self):
+        self.root = None
+
+    def init_app(self, app):
+        self.root = app.config.setdefault(
+            'UPLOAD_FOLDER', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uploads')
+        )
+        app.extensions['blob_store'] = self
+
+    @property
+    def blob_dir(self):
+        return os.path.join(self.root, 'blobs')
+
+    @property
+    def tmp_dir(self):
+        path = os.path.join(self.root, 'tmp')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def writer(self, max_size):
+        return BlobWriter(self.tmp_dir, max_size)
+
+    def path_for(self, sha256):
+        return os.path.join(self.blob_dir, sha256[:2], sha256)
+
+    def preview_path_for(self, sha256):
+        return os.path.join(self.root, 'previews', sha256[:2], f'{sha256}.jpg')
+
+    def sha_for_path(self, path):
+        """sha256 of a stored blob path, or None for legacy per-user files"""
+        if path and os.path.dirname(os.path.dirname(os.path.abspath(path))) == os.path.abspath(self.blob_dir):
+            return os.path.basename(path)
+        return None
+
+    def acquire(self, writer, content_type=None):
+        """Take a reference to a finished upload and move it into the store
+
+        Returns the blob path. The reference is taken first: while this
+        transaction holds the row, a concurrent release cannot drop the count
+        to zero and delete the file. Identical content already on disk is then
+        reused and the temp file dropped. Must be committed by the caller.
+        """
+        writer.close()
+        sha256 = writer.sha256
+        path = self.path_for(sha256)
+
+        created = False
+        if not self._increment(sha256):
+            try:
+                with db.session.begin_nested():
+                    db.session.add(DocumentBlob(
+                        sha256=sha256, size=writer.size, content_type=content_type, ref_count=1
+                    ))
+                    # New content gets previews/metadata built off the request path
+                    db.session.add(DocumentJob(sha256=sha256))
+                created = True
+            except IntegrityError:
+                # Another request stored the same content first
+                self._increment(sha256)
+
+        # A fresh row may follow a release whose file is about to be removed,
+        # so always put our copy in place then
+        if created or not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(writer.temp_path, path)
+        else:
+            os.remove(writer.temp_path)
+        return path
+
+    def release(self, path):
+        """Drop one reference to a blob path; the file goes when the count hits zero"""
+        sha256 = self.sha_for_path(path)
+        if sha256 is None:
+            return
+        db.session.execute(
+            update(DocumentBlob).where(DocumentBlob.sha256 == sha256).values(ref_count=DocumentBlob.ref_count - 1)
+        )
+        orphaned = db.session.execute(
+            delete(DocumentBlob).where(DocumentBlob.sha256 == sha256, DocumentBlob.ref_count <= 0)
+        ).rowcount
+        if orphaned:
+            db.session.info.setdefault('orphaned_blobs', set()).update((path, self.preview_path_for(sha256)))
+
+    def send(self, path, download_name):
+        """Conditional, range-capable response for a stored document (None if missing)
+
+        Blobs use their sha256 as a strong ETag and the DocumentBlob row for
+        type and Last-Modified. The file body is handed to the WSGI server's
+        file wrapper (sendfile where supported, or X-Sendfile when
+        USE_X_SENDFILE is set), never read into Python memory.
+        """
+        if not path or os.path.commonpath([os.path.abspath(path), os.path.abspath(self.root)]) != os.path.abspath(self.root):
+            return None
+        if not os.path.isfile(path):
+            return None
+        sha256 = self.sha_for_path(path)
+        blob = db.session.get(DocumentBlob, sha256) if sha256 else None
+        if blob is not None:
+            extension = mimetypes.guess_extension(blob.content_type or '') or ''
+            response = send_file(
+                path, mimetype=blob.content_type or 'application/octet-stream', as_attachment=True,
+                download_name=download_name + extension, conditional=True, etag=sha256,
+                last_modified=blob.created_at
+            )
+        else:
+            # Legacy per-user upload: werkzeug derives ETag and Last-Modified from the file
+            response = send_file(path, as_attachment=True, download_name=os.path.basename(path), conditional=True)
+        response.cache_control.private = True
+        return response
+
+    def send_preview(self, sha256):
+        """Cached JPEG preview of a blob written by the processing worker (None if missing)"""
+        path = db.session.query(DocumentBlob.preview_path).filter(DocumentBlob.sha256 == sha256).scalar()
+        if not path or not os.path.isfile(path):
+            return None
+        response = send_file(path, mimetype='image/jpeg', conditional=True, etag=f'{sha256}-preview')
+        response.cache_control.private = True
+        return response
+
+    @staticmethod
+    def _increment(sha256):
+        return db.session.execute(
+            update(DocumentBlob).where(DocumentBlob.sha256 == sha256).values(ref_count=DocumentBlob.ref_count + 1)
+        ).rowcount
+
+
+blob_store = BlobStore()
+
+
+@event.listens_for(Session, 'after_commit')
+def _remove_orphaned_blobs(session):
+    for path in session.info.pop('orphaned_blobs', ()):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+@event.listens_for(Session, 'after_rollback')
+def _keep_orphaned_blobs(session):
+    session.info.pop('orphaned_blobs', None)
@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with per-entry TTL"""
+
+    def __init__(self, maxsize=256, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SharedCacheBackend(ABC):
+    """Cache shared between worker processes; values must be JSON-serializable"""
+
+    def get(self, key):
+        raw = self._get_raw(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self._set_raw(key, json.dumps(value), ttl)
+
+    @abstractmethod
+    def delete(self, key):
+        """Remove ``key`` if present"""
+
+    @abstractmethod
+    def clear(self):
+        """Remove every entry owned by this backend"""
+
+    @abstractmethod
+    def _get_raw(self, key):
+        """Return the stored JSON string for ``key``, or None"""
+
+    @abstractmethod
+    def _set_raw(self, key, raw, ttl):
+        """Store the JSON string ``raw`` under ``key`` for ``ttl`` seconds (0/None: no expiry)"""
+
+
+class LocalSharedBackend(SharedCacheBackend):
+    """In-process stand-in for a shared cache, used in development and tests
+
+    Values are stored JSON-encoded so callers see the same round-trip
+    behaviour they would get from a networked store.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _get_raw(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            raw, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            return raw
+
+    def _set_raw(self, key, raw, ttl):
+        with self._lock:
+            self._data[key] = (raw, time.time() + ttl if ttl else None)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend(SharedCacheBackend):
+    """Shared cache backed by Redis (requires the optional ``redis`` package)"""
+
+    def __init__(self, url, prefix='neo-loan-hub:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError('The redis package is required for a redis:// cache URL') from e
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def _get_raw(self, key):
+        return self._client.get(self._prefix + key)
+
+    def _set_raw(self, key, raw, ttl):
+        self._client.set(self._prefix + key, raw, ex=ttl or None)
+
+    def delete(self, key):
+        self._client.delete(self._prefix + key)
+
+    def clear(self):
+        for key in self._client.scan_iter(self._prefix + '*'):
+            self._client.delete(key)
+
+
+def create_backend(name, url=None, maxsize=256, ttl=300):
+    """Build a cache backend from config values ('memory' or 'shared')"""
+    if name == 'shared':
+        if url:
+            return RedisBackend(url)
+        return LocalSharedBackend()
+    return LRUCache(maxsize=maxsize, ttl=ttl)
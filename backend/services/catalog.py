@@ -0,0 +1,144 @@
+import time
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, joinedload
+
+from models import db, LoanProduct, AdminBank
+from services.cache import create_backend
+from services.interval_index import AmountIntervalIndex
+
+CATALOG_KEY = 'catalog:products'
+
+
+class ProductCatalog:
+    """Read-through cache of the loan product catalogue
+
+    The catalogue is stored as one snapshot together with a version built
+    from ``LoanProduct.updated_at``/``AdminBank.updated_at``. Once the TTL
+    passes, the version is re-checked with a single aggregate query and the
+    rows are only reloaded if it changed. Commits touching products or banks
+    drop the snapshot straight away.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.ttl = 300
+        self._index = (None, None)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.setdefault('CATALOG_CACHE_TTL', 300)
+        self.backend = create_backend(
+            app.config.setdefault('CATALOG_CACHE_BACKEND', 'memory'),
+            url=app.config.setdefault('CATALOG_CACHE_URL', None),
+            maxsize=app.config.setdefault('CATALOG_CACHE_SIZE', 16),
+            ttl=0
+        )
+        app.extensions['product_catalog'] = self
+
+    def invalidate(self):
+        if self.backend is not None:
+            self.backend.delete(CATALOG_KEY)
+
+    def snapshot(self):
+        """Return the cached catalogue, reloading it when stale"""
+        now = time.time()
+        entry = self.backend.get(CATALOG_KEY)
+        if entry is not None and now - entry['checked_at'] < self.ttl:
+            return entry
+        version = _catalog_version()
+        if entry is None or entry['version'] != version:
+            entry = _load_catalog(version)
+        entry['checked_at'] = now
+        self.backend.set(CATALOG_KEY, entry)
+        return entry
+
+    def amount_index(self, entry=None):
+        """Interval index over the snapshot's amount ranges, rebuilt per version"""
+        entry = entry or self.snapshot()
+        version, index = self._index
+        if index is None or version != entry['version']:
+            index = AmountIntervalIndex(
+                (lo, hi, position) for position, (_, lo, hi) in enumerate(entry['bounds'])
+            )
+            self._index = (entry['version'], index)
+        return index
+
+    def get_products(self, bank_id=None, min_amount=None, max_amount=None, amount=None):
+        """Filter the cached catalogue the same way the SQL filters did
+
+        ``amount`` narrows the result to products that can lend exactly that sum.
+        """
+        entry = self.snapshot()
+        if min_amount or max_amount:
+            index = self.amount_index(entry)
+            positions = set(index.overlapping(min_amount or None, max_amount or None))
+            if amount is not None:
+                positions.intersection_update(index.containing(amount))
+            positions = sorted(positions)
+        elif amount is not None:
+            # A stabbing query on its own; an open overlap query would list every product
+            positions = sorted(self.amount_index(entry).containing(amount))
+        else:
+            positions = range(len(entry['products']))
+        return [
+            entry['products'][position] for position in positions
+            if not bank_id or entry['bounds'][position][0] == bank_id
+        ]
+
+    def get_product(self, product_id):
+        entry = self.snapshot()
+        position = entry['positions'].get(str(product_id))
+        return entry['products'][position] if position is not None else None
+
+
+def _catalog_version():
+    product_version = db.session.query(
+        func.max(LoanProduct.updated_at), func.count(LoanProduct.loan_product_id)
+    ).one()
+    bank_version = db.session.query(func.max(AdminBank.updated_at)).scalar()
+    return [
+        product_version[0].isoformat() if product_version[0] else None,
+        product_version[1],
+        bank_version.isoformat() if bank_version else None
+    ]
+
+
+def _load_catalog(version):
+    rows = LoanProduct.query.options(joinedload(LoanProduct.bank)).order_by(LoanProduct.loan_product_id).all()
+    return {
+        'version': version,
+        'products': [product.to_dict() for product in rows],
+        'bounds': [
+            [
+                product.bank_id,
+                float(product.min_amount) if product.min_amount is not None else None,
+                float(product.max_amount) if product.max_amount is not None else None
+            ]
+            for product in rows
+        ],
+        'positions': {str(product.loan_product_id): i for i, product in enumerate(rows)}
+    }
+
+
+catalog = ProductCatalog()
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_catalog_changes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, (LoanProduct, AdminBank)):
+            session.info['catalog_dirty'] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_catalog(session):
+    if session.info.pop('catalog_dirty', False):
+        catalog.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_catalog_changes(session):
+    session.info.pop('catalog_dirty', None)
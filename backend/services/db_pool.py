@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+# Checkout latencies kept for the percentile figures on the metrics endpoint
+LATENCY_SAMPLES = 2048
+
+
+class PoolMetrics:
+    """Process-wide counters for the instrumented connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.waiting = 0
+            self.peak_waiting = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self._samples = deque(maxlen=LATENCY_SAMPLES)
+
+    def start_checkout(self):
+        with self._lock:
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+
+    def finish_checkout(self, elapsed, timed_out=False):
+        with self._lock:
+            self.waiting -= 1
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait += elapsed
+            self.max_wait = max(self.max_wait, elapsed)
+            self._samples.append(elapsed)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, pool=None):
+        with self._lock:
+            samples = sorted(self._samples)
+            data = {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'waiting': self.waiting,
+                'peak_waiting': self.peak_waiting,
+                'checkout_ms': {
+                    'mean': round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else None,
+                    'p50': _percentile_ms(samples, 0.50),
+                    'p95': _percentile_ms(samples, 0.95),
+                    'p99': _percentile_ms(samples, 0.99),
+                    'max': round(self.max_wait * 1000, 3)
+                }
+            }
+        if isinstance(pool, QueuePool):
+            data['pool'] = {
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+                'timeout': pool.timeout()
+            }
+        return data
+
+
+def _percentile_ms(samples, fraction):
+    if not samples:
+        return None
+    return round(samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1000, 3)
+
+
+metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout latency and how many callers are queued"""
+
+    def connect(self):
+        metrics.start_checkout()
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeout:
+            metrics.finish_checkout(time.perf_counter() - started, timed_out=True)
+            raise
+        except Exception:
+            metrics.finish_checkout(time.perf_counter() - started)
+            raise
+        metrics.finish_checkout(time.perf_counter() - started)
+        return connection
+
+
+@event.listens_for(InstrumentedQueuePool, 'connect')
+def _on_connect(dbapi_connection, connection_record):
+    metrics.record_connect()
+
+
+@event.listens_for(InstrumentedQueuePool, 'invalidate')
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    metrics.record_invalidation()
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* settings in ``config``
+
+    In-memory SQLite keeps Flask-SQLAlchemy's single shared connection, since
+    a sized pool would hand each checkout a different empty database.
+    """
+    uri = config.get('SQLALCHEMY_DATABASE_URI', '')
+    if uri.startswith('sqlite') and (uri in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in uri):
+        return {}
+    return {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING']
+    }
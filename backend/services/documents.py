@@ -0,0 +1,204 @@
+"""Background processing for uploaded documents
+
+Every newly stored blob gets a row in ``document_jobs``. A worker (``flask
+process-documents``) claims queued jobs with a compare-and-set UPDATE, so
+several workers can share the table, then verifies the blob's checksum,
+extracts page counts / image dimensions and writes a small JPEG preview.
+Previews need the optional Pillow package; without it only metadata is
+recorded. PDFs whose page objects sit in compressed object streams need the
+optional pypdf package to be counted; without it their page count is left
+unknown.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import re
+import socket
+import struct
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from models import db, DocumentBlob, DocumentJob
+from services.blobs import CHUNK_SIZE, blob_store
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_SIZE = (320, 320)
+MAX_ATTEMPTS = 3
+# Running jobs older than this are assumed to belong to a dead worker
+STALE_AFTER = timedelta(minutes=10)
+
+_PDF_PAGE = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+_PDF_OBJECT_STREAM = re.compile(rb'/Type\s*/ObjStm(?![A-Za-z])')
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _pillow():
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+def _pypdf():
+    try:
+        import pypdf
+    except ImportError:
+        return None
+    return pypdf
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def pdf_page_count(path):
+    """Page count of a PDF, or None when it cannot be determined
+
+    Uses pypdf when installed. Otherwise page objects are counted in the raw
+    file, which only works while they are not inside compressed object
+    streams (PDF 1.5+), so such files report None rather than a wrong count.
+    """
+    pypdf = _pypdf()
+    if pypdf is not None:
+        try:
+            return len(pypdf.PdfReader(path, strict=False).pages) or None
+        except Exception as e:
+            logger.warning(f"pypdf could not read {path}: {str(e)}")
+            return None
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if _PDF_OBJECT_STREAM.search(data):
+            return None
+        count = sum(1 for _ in _PDF_PAGE.finditer(data))
+    return count or None
+
+
+def image_size(path):
+    """(width, height) from a PNG or JPEG header, or (None, None)"""
+    with open(path, 'rb') as f:
+        head = f.read(24)
+        if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+            return struct.unpack('>II', head[16:24])
+        if not head.startswith(b'\xff\xd8'):
+            return None, None
+        f.seek(2)
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None, None
+            length = struct.unpack('>H', f.read(2))[0]
+            if marker[1] in _JPEG_SOF:
+                height, width = struct.unpack('>xHH', f.read(5))
+                return width, height
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def write_preview(path, target, image_module):
+    """Downscale an image to a JPEG preview at ``target``; returns the original size"""
+    with image_module.open(path) as image:
+        size = image.size
+        # JPEG can decode straight at a reduced scale
+        image.draft('RGB', PREVIEW_SIZE)
+        image.thumbnail(PREVIEW_SIZE)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        partial = target + '.part'
+        image.convert('RGB').save(partial, 'JPEG', quality=80, optimize=True)
+    os.replace(partial, target)
+    return size
+
+
+def process_blob(sha256):
+    """Build metadata (and a preview when possible) for one stored blob"""
+    path = blob_store.path_for(sha256)
+    if file_sha256(path) != sha256:
+        raise ValueError(f'Checksum mismatch for {sha256}')
+    with open(path, 'rb') as f:
+        head = f.read(8)
+
+    fields = {'processed_at': datetime.utcnow()}
+    if head.startswith(b'%PDF'):
+        fields['page_count'] = pdf_page_count(path)
+    else:
+        fields['page_count'] = 1
+        image_module = _pillow()
+        if image_module is not None:
+            preview = blob_store.preview_path_for(sha256)
+            fields['width'], fields['height'] = write_preview(path, preview, image_module)
+            fields['preview_path'] = preview
+        else:
+            fields['width'], fields['height'] = image_size(path)
+    # Core UPDATE: the blob may have been released while we worked
+    db.session.execute(update(DocumentBlob).where(DocumentBlob.sha256 == sha256).values(**fields))
+
+
+def claim_jobs(worker, limit):
+    """Move up to ``limit`` queued jobs to Running for ``worker``"""
+    now = datetime.utcnow()
+    # Jobs of a dead worker are retried, unless they already used every attempt
+    # (e.g. a file that crashes the worker each time)
+    stale = (DocumentJob.status == 'Running', DocumentJob.started_at < now - STALE_AFTER)
+    db.session.execute(
+        update(DocumentJob).where(*stale, DocumentJob.attempts >= MAX_ATTEMPTS).values(
+            status='Failed', last_error='Worker stopped before finishing the job', finished_at=now
+        )
+    )
+    db.session.execute(update(DocumentJob).where(*stale).values(status='Queued'))
+    candidates = [job_id for (job_id,) in db.session.query(DocumentJob.id).filter(
+        DocumentJob.status == 'Queued'
+    ).order_by(DocumentJob.id).limit(limit)]
+    claimed = []
+    for job_id in candidates:
+        won = db.session.execute(
+            update(DocumentJob).where(DocumentJob.id == job_id, DocumentJob.status == 'Queued').values(
+                status='Running', worker=worker, started_at=now, attempts=DocumentJob.attempts + 1
+            )
+        ).rowcount
+        if won:
+            claimed.append(job_id)
+    db.session.commit()
+    return claimed
+
+
+def run_job(job_id):
+    job = db.session.get(DocumentJob, job_id)
+    try:
+        if os.path.exists(blob_store.path_for(job.sha256)):
+            process_blob(job.sha256)
+        job.status = 'Done'
+        job.last_error = None
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Document job {job_id} error: {str(e)}")
+        job = db.session.get(DocumentJob, job_id)
+        job.status = 'Failed' if job.attempts >= MAX_ATTEMPTS else 'Queued'
+        job.last_error = str(e)
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return job.status
+
+
+def run_worker(batch_size=10, once=False, poll_interval=2.0, worker=None):
+    """Process queued document jobs; returns counts by final status
+
+    With ``once`` the worker exits when the queue is empty, otherwise it
+    polls every ``poll_interval`` seconds.
+    """
+    worker = worker or f'{socket.gethostname()}:{os.getpid()}'
+    counts = {}
+    while True:
+        claimed = claim_jobs(worker, batch_size)
+        for job_id in claimed:
+            status = run_job(job_id)
+            counts[status] = counts.get(status, 0) + 1
+        if not claimed:
+            if once:
+                return counts
+            time.sleep(poll_interval)
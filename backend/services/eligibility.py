@@ -0,0 +1,105 @@
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import func
+
+from models import db, PersonalDetails, FinancialDetails, EmploymentDetails, Loan
+from services.emi import annuity_factor
+from services.rules import DEFAULT_RULES, product_rules
+
+Applicant = namedtuple('Applicant', [
+    'user_id', 'age', 'employment_status', 'total_monthly_income', 'monthly_emi', 'active_loans'
+])
+
+
+def load_applicant(user_id):
+    """Load everything the eligibility rules need for one user in a single query
+
+    Returns None when the user has no financial or employment details yet.
+    """
+    active_loans = db.session.query(func.count(Loan.loan_id)).filter(
+        Loan.user_id == PersonalDetails.user_id, Loan.status == 'Active'
+    ).correlate(PersonalDetails).scalar_subquery()
+    row = db.session.query(
+        PersonalDetails.date_of_birth,
+        FinancialDetails.id,
+        FinancialDetails.monthly_emi,
+        EmploymentDetails.id,
+        EmploymentDetails.employment_status,
+        EmploymentDetails.monthly_income,
+        EmploymentDetails.other_income,
+        active_loans
+    ).outerjoin(
+        FinancialDetails, FinancialDetails.user_id == PersonalDetails.user_id
+    ).outerjoin(
+        EmploymentDetails, EmploymentDetails.user_id == PersonalDetails.user_id
+    ).filter(PersonalDetails.user_id == user_id).first()
+
+    if row is None:
+        return None
+    date_of_birth, financial_id, monthly_emi, employment_id, status, income, other_income, active = row
+    if financial_id is None or employment_id is None:
+        return None
+    age = (datetime.now().date() - date_of_birth).days // 365 if date_of_birth else None
+    return Applicant(
+        user_id=user_id,
+        age=age,
+        employment_status=status,
+        total_monthly_income=float(income or 0) + float(other_income or 0),
+        monthly_emi=float(monthly_emi or 0),
+        active_loans=active or 0
+    )
+
+
+def applicant_env(applicant):
+    """Variables the eligibility rules are evaluated against"""
+    income = applicant.total_monthly_income
+    return {
+        'age': applicant.age if applicant.age is not None else float('inf'),
+        'employment_status': applicant.employment_status,
+        'total_monthly_income': income,
+        'monthly_emi': applicant.monthly_emi,
+        'debt_to_income': (applicant.monthly_emi / income) * 100 if income > 0 else 0.0,
+        'active_loans': applicant.active_loans
+    }
+
+
+def assess_applicant(applicant):
+    """Product-independent eligibility checks, evaluated once per applicant"""
+    eligible, reasons, recommendations = DEFAULT_RULES.evaluate(applicant_env(applicant))
+    return {
+        'eligible': eligible,
+        'reasons': reasons,
+        'recommendations': recommendations
+    }
+
+
+def maximum_eligible_amount(applicant, product, tenure_months=12):
+    """Largest amount of ``product`` (a LoanProduct.to_dict()) the applicant can service"""
+    # Maximum EMI should be 40% of the income left after existing EMIs
+    max_monthly_emi = (applicant.total_monthly_income - applicant.monthly_emi) * 0.4
+    if max_monthly_emi <= 0 or tenure_months <= 0 or product['interest_rate'] is None:
+        return None
+    max_loan_amount = max_monthly_emi * annuity_factor(product['interest_rate'], tenure_months)
+    if product['max_amount'] is not None:
+        max_loan_amount = min(max_loan_amount, product['max_amount'])
+    return max_loan_amount
+
+
+def product_verdict(assessment, applicant, product, tenure_months=12):
+    """Combine the applicant assessment with one product's limits"""
+    verdict = {
+        'eligible': assessment['eligible'],
+        'reasons': list(assessment['reasons']),
+        'recommendations': list(assessment['recommendations']),
+        'maximum_eligible_amount': None
+    }
+    rules = product_rules(product)
+    if rules:
+        eligible, reasons, recommendations = rules.evaluate(applicant_env(applicant))
+        verdict['eligible'] = verdict['eligible'] and eligible
+        verdict['reasons'].extend(reasons)
+        verdict['recommendations'].extend(recommendations)
+    if verdict['eligible'] and applicant.total_monthly_income > 0:
+        verdict['maximum_eligible_amount'] = maximum_eligible_amount(applicant, product, tenure_months)
+    return verdict
@@ -0,0 +1,141 @@
+from functools import lru_cache
+
+import numpy as np
+
+MAX_BATCH_QUOTES = 100_000
+MAX_SCHEDULE_CELLS = 1_000_000
+
+
+class EMIInputError(ValueError):
+    """Raised when a batch EMI request is malformed or too large"""
+
+
+@lru_cache(maxsize=4096)
+def annuity_factor(annual_rate, tenure_months):
+    """Present value of 1 paid monthly for ``tenure_months`` at ``annual_rate`` percent
+
+    Rates and tenures come from a small discrete set (product rates times
+    common tenures), so the factors are memoized on first use and shared by
+    every scalar EMI calculation: ``emi = principal / factor`` and, inversely,
+    ``max_principal = emi * factor``.
+    """
+    monthly_rate = annual_rate / (12 * 100)
+    if monthly_rate == 0:
+        return float(tenure_months)
+    return (1 - (1 + monthly_rate) ** -tenure_months) / monthly_rate
+
+
+def check_batch_size(count):
+    if count > MAX_BATCH_QUOTES:
+        raise EMIInputError(f'At most {MAX_BATCH_QUOTES} quotes per request')
+
+
+def grid(loan_amounts, interest_rates, tenure_months):
+    """Cartesian product of the three parameter lists as flat arrays
+
+    The product size is checked before any array is built, so oversized
+    grids are rejected without allocating them.
+    """
+    for values in (loan_amounts, interest_rates, tenure_months):
+        if not isinstance(values, list):
+            raise EMIInputError('loan_amounts, interest_rates and tenure_months must be lists')
+    check_batch_size(len(loan_amounts) * len(interest_rates) * len(tenure_months))
+    amounts, rates, tenures = np.meshgrid(
+        np.asarray(loan_amounts, dtype=np.float64),
+        np.asarray(interest_rates, dtype=np.float64),
+        np.asarray(tenure_months, dtype=np.int64),
+        indexing='ij'
+    )
+    return amounts.ravel(), rates.ravel(), tenures.ravel()
+
+
+def validate(amounts, rates, tenures):
+    if not (amounts.shape == rates.shape == tenures.shape):
+        raise EMIInputError('loan_amount, interest_rate and tenure_months must have the same length')
+    if amounts.size == 0:
+        raise EMIInputError('At least one quote is required')
+    check_batch_size(amounts.size)
+    if not (np.isfinite(amounts).all() and np.isfinite(rates).all()):
+        raise EMIInputError('Amounts and rates must be finite numbers')
+    if (amounts <= 0).any() or (tenures <= 0).any() or (rates < 0).any():
+        raise EMIInputError('Amounts and tenures must be positive and rates non-negative')
+
+
+def compute_emi(amounts, rates, tenures):
+    """Vectorized EMI, total amount and total interest for each quote
+
+    ``rates`` are annual percentages, as stored on ``LoanProduct.interest_rate``.
+    """
+    monthly_rate = rates / (12 * 100)
+    growth = np.power(1 + monthly_rate, tenures)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        emi = np.where(
+            monthly_rate == 0,
+            amounts / tenures,
+            amounts * monthly_rate * growth / (growth - 1)
+        )
+    total_amount = emi * tenures
+    return emi, total_amount, total_amount - amounts
+
+
+def amortization(amounts, rates, tenures, emi):
+    """Per-month principal, interest and closing balance for each quote
+
+    Returns three (quotes, max_tenure) arrays; months past a quote's tenure
+    are NaN so ragged schedules fit one matrix.
+    """
+    if amounts.size * int(tenures.max()) > MAX_SCHEDULE_CELLS:
+        raise EMIInputError('Requested schedules are too large; reduce quotes or tenures')
+    monthly_rate = (rates / (12 * 100))[:, None]
+    months = np.arange(1, int(tenures.max()) + 1)[None, :]
+    growth = np.power(1 + monthly_rate, months)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        balance = np.where(
+            monthly_rate == 0,
+            amounts[:, None] - emi[:, None] * months,
+            amounts[:, None] * growth - emi[:, None] * (growth - 1) / monthly_rate
+        )
+    opening = np.concatenate([amounts[:, None], balance[:, :-1]], axis=1)
+    interest = opening * monthly_rate
+    principal = emi[:, None] - interest
+    past_end = months > tenures[:, None]
+    balance = np.where(past_end, np.nan, np.maximum(balance, 0))
+    return np.where(past_end, np.nan, principal), np.where(past_end, np.nan, interest), balance
+
+
+def _column(values):
+    return np.round(values, 2).tolist()
+
+
+def quote_batch(amounts, rates, tenures, include_schedule=False):
+    """Build the columnar response payload for a batch of quotes"""
+    amounts = np.asarray(amounts, dtype=np.float64)
+    rates = np.asarray(rates, dtype=np.float64)
+    tenures = np.asarray(tenures, dtype=np.int64)
+    validate(amounts, rates, tenures)
+    emi, total_amount, total_interest = compute_emi(amounts, rates, tenures)
+    if not np.isfinite(total_amount).all():
+        # Finite but extreme inputs can still overflow; NaN/inf are not valid JSON
+        raise EMIInputError('Amounts, rates or tenures are too large to quote')
+    payload = {
+        'count': int(amounts.size),
+        'columns': {
+            'loan_amount': amounts.tolist(),
+            'interest_rate': rates.tolist(),
+            'tenure_months': tenures.tolist(),
+            'monthly_emi': _column(emi),
+            'total_amount': _column(total_amount),
+            'total_interest': _column(total_interest)
+        }
+    }
+    if include_schedule:
+        principal, interest, balance = amortization(amounts, rates, tenures, emi)
+        payload['schedules'] = [
+            {
+                'principal': _column(principal[i, :n]),
+                'interest': _column(interest[i, :n]),
+                'balance': _column(balance[i, :n])
+            }
+            for i, n in enumerate(tenures.tolist())
+        ]
+    return payload
@@ -0,0 +1,101 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, IdempotencyKey
+from services.cache import LRUCache
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyReused(ValueError):
+    """The key was already used for a request with a different body"""
+
+
+def fingerprint(data):
+    """SHA-256 of a request body, independent of key order"""
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """Responses recorded per (user, Idempotency-Key) so client retries can be replayed
+
+    Rows live in ``idempotency_keys`` until ``expires_at`` and are written in
+    the same transaction as the work they describe. Committed entries are also
+    kept in a per-process LRU so most retries never reach the database.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 24 * 60 * 60
+        self._recent = LRUCache(maxsize=4096, ttl=self.ttl)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.setdefault('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+        self._recent = LRUCache(maxsize=app.config.setdefault('IDEMPOTENCY_CACHE_SIZE', 4096), ttl=self.ttl)
+        app.extensions['idempotency_keys'] = self
+
+    def lookup(self, user_id, key, request_hash):
+        """Return (body, status_code) stored for the key, or None
+
+        Raises IdempotencyKeyReused if the key was used with another body.
+        """
+        entry = self._recent.get((user_id, key))
+        if entry is None:
+            row = db.session.query(
+                IdempotencyKey.request_hash, IdempotencyKey.status_code, IdempotencyKey.response_body,
+                IdempotencyKey.expires_at
+            ).filter_by(user_id=user_id, idempotency_key=key).first()
+            if row is None or row.expires_at <= datetime.utcnow():
+                return None
+            entry = (row.request_hash, row.status_code, json.loads(row.response_body))
+            self._recent.set((user_id, key), entry, ttl=(row.expires_at - datetime.utcnow()).total_seconds())
+        stored_hash, status_code, body = entry
+        if stored_hash != request_hash:
+            raise IdempotencyKeyReused('Idempotency-Key was already used with a different request')
+        return body, status_code
+
+    def save(self, user_id, key, request_hash, body, status_code):
+        """Record the response in the caller's transaction (flushed, so a concurrent duplicate fails here)"""
+        now = datetime.utcnow()
+        IdempotencyKey.query.filter(
+            IdempotencyKey.user_id == user_id, IdempotencyKey.idempotency_key == key,
+            IdempotencyKey.expires_at <= now
+        ).delete(synchronize_session=False)
+        db.session.add(IdempotencyKey(
+            user_id=user_id, idempotency_key=key, request_hash=request_hash, status_code=status_code,
+            response_body=json.dumps(body), created_at=now, expires_at=now + timedelta(seconds=self.ttl)
+        ))
+        db.session.flush()
+        db.session.info.setdefault('idempotent_responses', []).append(
+            ((user_id, key), (request_hash, status_code, body))
+        )
+
+    def remember(self, cache_key, entry):
+        self._recent.set(cache_key, entry)
+
+    def purge_expired(self):
+        """Delete expired keys; returns the number removed"""
+        removed = IdempotencyKey.query.filter(
+            IdempotencyKey.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return removed
+
+
+idempotency_keys = IdempotencyStore()
+
+
+@event.listens_for(Session, 'after_commit')
+def _cache_idempotent_responses(session):
+    for cache_key, entry in session.info.pop('idempotent_responses', ()):
+        idempotency_keys.remember(cache_key, entry)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_idempotent_responses(session):
+    session.info.pop('idempotent_responses', None)
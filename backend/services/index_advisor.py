@@ -0,0 +1,127 @@
+"""EXPLAIN the loan endpoints' query shapes and flag full scans and sorts
+
+Each shape below is built with the same constructs the endpoint uses, bound
+to sample ids from the target database, then compiled for that database's
+dialect and run through EXPLAIN (SQLite, MySQL/MariaDB or PostgreSQL).
+"""
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert, select, text
+
+from models import db, AdminBank, LoanProduct, Loan, PersonalDetails
+from services.pagination import DEFAULT_PAGE_SIZE, apply_loan_keyset
+
+
+def query_shapes(sample):
+    """(name, endpoint, statement) for every hot loan query"""
+    user_id, bank_id = sample['user_id'], sample['bank_id']
+    page = DEFAULT_PAGE_SIZE + 1
+    return [
+        ('my_loans', 'GET /api/loans/my-loans',
+         select(Loan).where(Loan.user_id == user_id).order_by(Loan.application_date.desc())),
+        ('my_loans_by_status', 'GET /api/loans/my-loans?status=',
+         select(Loan).where(Loan.user_id == user_id, Loan.status == 'Approved').order_by(Loan.application_date.desc())),
+        ('active_loan_count', 'POST /api/eligibility/check',
+         select(func.count(Loan.loan_id)).where(Loan.user_id == user_id, Loan.status == 'Active')),
+        ('admin_loans_page', 'GET /api/admin/loans',
+         apply_loan_keyset(select(Loan), Loan, None).limit(page)),
+        ('admin_loans_by_status', 'GET /api/admin/loans?status=',
+         apply_loan_keyset(select(Loan).where(Loan.status == 'Pending'), Loan, None).limit(page)),
+        ('admin_loans_by_bank', 'GET /api/admin/loans?bank_id=',
+         apply_loan_keyset(select(Loan).join(LoanProduct).where(LoanProduct.bank_id == bank_id), Loan, None).limit(page)),
+    ]
+
+
+def explain(connection, statement):
+    """Return (plan lines, findings) for one statement on ``connection``"""
+    dialect = connection.dialect.name
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    findings = []
+    if dialect == 'sqlite':
+        rows = connection.execute(text(f'EXPLAIN QUERY PLAN {sql}')).all()
+        lines = [row[3] for row in rows]
+        for line in lines:
+            if line.startswith('SCAN ') and 'INDEX' not in line:
+                findings.append(f'full scan: {line}')
+            if 'TEMP B-TREE' in line:
+                findings.append(f'sort: {line}')
+    elif dialect in ('mysql', 'mariadb'):
+        rows = connection.execute(text(f'EXPLAIN {sql}')).mappings().all()
+        lines = [
+            f"{row['table']}: type={row['type']} key={row['key']} rows={row['rows']} {row.get('Extra') or ''}".strip()
+            for row in rows
+        ]
+        for row in rows:
+            if row['type'] == 'ALL':
+                findings.append(f"full scan: {row['table']}")
+            if 'filesort' in (row.get('Extra') or ''):
+                findings.append(f"sort: {row['table']} (Using filesort)")
+    else:
+        lines = [row[0] for row in connection.execute(text(f'EXPLAIN {sql}')).all()]
+        for line in lines:
+            if 'Seq Scan' in line:
+                findings.append(f'full scan: {line.strip()}')
+            if line.strip().startswith('Sort'):
+                findings.append(f'sort: {line.strip()}')
+    return lines, findings
+
+
+def sample_ids(connection):
+    """Ids to bind into the shapes, taken from the busiest user and product"""
+    user_id = connection.execute(
+        select(Loan.user_id).group_by(Loan.user_id).order_by(func.count().desc()).limit(1)
+    ).scalar() or 1
+    product_id, bank_id = connection.execute(
+        select(LoanProduct.loan_product_id, LoanProduct.bank_id).limit(1)
+    ).first() or (1, 1)
+    return {'user_id': user_id, 'loan_product_id': product_id, 'bank_id': bank_id}
+
+
+def advise(engine):
+    """EXPLAIN every shape on ``engine``; returns a list of report dicts"""
+    report = []
+    with engine.connect() as connection:
+        sample = sample_ids(connection)
+        for name, endpoint, statement in query_shapes(sample):
+            lines, findings = explain(connection, statement)
+            report.append({'name': name, 'endpoint': endpoint, 'plan': lines, 'findings': findings})
+    return report
+
+
+def seed_scratch(path, users=2000, loans=50000, banks=10, products=40):
+    """Create a SQLite file with the app schema and synthetic data, ANALYZEd"""
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine)
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        connection.execute(insert(AdminBank), [{'bank_name': f'Bank {i}'} for i in range(banks)])
+        connection.execute(insert(LoanProduct), [
+            {'bank_id': 1 + i % banks, 'product_name': f'Product {i}', 'min_amount': 10000,
+             'max_amount': 5000000, 'interest_rate': 8 + i % 10}
+            for i in range(products)
+        ])
+        connection.execute(insert(PersonalDetails), [
+            {'full_name': f'User {i}', 'email': f'user{i}@example.com', 'date_of_birth': datetime(1990, 1, 1).date(),
+             'gender': 'Other', 'nationality': 'Indian', 'marital_status': 'Single', 'contact_number': '0',
+             'password_hash': '-', 'permanent_address': '-'}
+            for i in range(users)
+        ])
+        statuses = ['Pending', 'Approved', 'Rejected', 'Active', 'Closed']
+        rows, pending = [], set()
+        for _ in range(loans):
+            user_id, product_id, status = 1 + rng.randrange(users), 1 + rng.randrange(products), rng.choice(statuses)
+            if status == 'Pending' and (user_id, product_id) in pending:
+                # One pending application per user and product (uq_loans_user_product_pending)
+                status = 'Closed'
+            elif status == 'Pending':
+                pending.add((user_id, product_id))
+            rows.append({
+                'user_id': user_id, 'loan_product_id': product_id, 'loan_amount': rng.randrange(10000, 5000000),
+                'tenure_months': 12, 'interest_rate': 10.5, 'monthly_emi': 1000, 'status': status,
+                'application_date': now - timedelta(minutes=rng.randrange(365 * 24 * 60))
+            })
+        connection.execute(insert(Loan), rows)
+        connection.execute(text('ANALYZE'))
+    return engine
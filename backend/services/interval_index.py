@@ -0,0 +1,110 @@
+from bisect import bisect_right
+from math import inf
+
+
+class _Node:
+    __slots__ = ('center', 'by_lo', 'by_hi', 'left', 'right')
+
+    def __init__(self, center, by_lo, by_hi, left, right):
+        self.center = center
+        self.by_lo = by_lo
+        self.by_hi = by_hi
+        self.left = left
+        self.right = right
+
+
+class AmountIntervalIndex:
+    """Static interval index over loan product [min_amount, max_amount] ranges
+
+    A centered interval tree answers "which ranges contain X" and a sorted
+    array of lower bounds answers the rest of an overlap query, both in
+    O(log n + k). Ranges with a missing or inverted bound are kept aside and
+    checked linearly so results match the SQL predicates exactly.
+    """
+
+    def __init__(self, intervals):
+        """``intervals`` is an iterable of (lo, hi, key); lo/hi may be None"""
+        complete = []
+        self._partial = []
+        for lo, hi, key in intervals:
+            if lo is None or hi is None or lo > hi:
+                self._partial.append((lo, hi, key))
+            else:
+                complete.append((lo, hi, key))
+        self._root = self._build(complete)
+        complete.sort(key=lambda item: item[0])
+        self._starts = [lo for lo, _, _ in complete]
+        self._sorted = complete
+
+    def __len__(self):
+        return len(self._sorted) + len(self._partial)
+
+    @classmethod
+    def _build(cls, intervals):
+        if not intervals:
+            return None
+        endpoints = sorted(x for lo, hi, _ in intervals for x in (lo, hi))
+        center = endpoints[len(endpoints) // 2]
+        here, left, right = [], [], []
+        for item in intervals:
+            if item[1] < center:
+                left.append(item)
+            elif item[0] > center:
+                right.append(item)
+            else:
+                here.append(item)
+        return _Node(
+            center,
+            sorted(here, key=lambda item: item[0]),
+            sorted(here, key=lambda item: item[1], reverse=True),
+            cls._build(left),
+            cls._build(right)
+        )
+
+    def _stab(self, x):
+        node = self._root
+        found = []
+        while node is not None:
+            if x < node.center:
+                for lo, hi, key in node.by_lo:
+                    if lo > x:
+                        break
+                    found.append((lo, hi, key))
+                node = node.left
+            elif x > node.center:
+                for lo, hi, key in node.by_hi:
+                    if hi < x:
+                        break
+                    found.append((lo, hi, key))
+                node = node.right
+            else:
+                found.extend(node.by_lo)
+                break
+        return found
+
+    def containing(self, amount):
+        """Keys of ranges with lo <= amount <= hi"""
+        return [key for _, _, key in self._stab(amount)]
+
+    def overlapping(self, lo=None, hi=None):
+        """Keys of ranges with range.hi >= lo and range.lo <= hi
+
+        Either bound may be None for an open-ended query, mirroring the
+        ``min_amount``/``max_amount`` product filters.
+        """
+        qlo = -inf if lo is None else lo
+        qhi = inf if hi is None else hi
+        if qlo <= qhi:
+            keys = [key for _, _, key in self._stab(qlo)] if qlo != -inf else []
+            start = bisect_right(self._starts, qlo) if qlo != -inf else 0
+            end = bisect_right(self._starts, qhi) if qhi != inf else len(self._starts)
+            keys.extend(key for _, _, key in self._sorted[start:end])
+        else:
+            keys = [key for _, range_hi, key in self._stab(qhi) if range_hi >= qlo]
+        for range_lo, range_hi, key in self._partial:
+            if lo is not None and (range_hi is None or range_hi < lo):
+                continue
+            if hi is not None and (range_lo is None or range_lo > hi):
+                continue
+            keys.append(key)
+        return keys
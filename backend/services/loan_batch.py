@@ -0,0 +1,100 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import select, update
+
+from models import db, Loan
+from services.loan_state import TRANSITIONS
+from services.stats import record_transition
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_BATCH_SIZE = 5000
+
+# Transitions with a single source status, so one UPDATE covers a chunk
+BATCH_ACTIONS = ('approve', 'reject', 'disburse')
+
+
+def parse_loan_ids(values):
+    """Validate a list of loan ids, dropping duplicates but keeping order"""
+    if not isinstance(values, list) or not values:
+        raise ValueError('loan_ids must be a non-empty list')
+    if len(values) > MAX_BATCH_SIZE:
+        raise ValueError(f'At most {MAX_BATCH_SIZE} loan ids per request')
+    loan_ids = []
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).isdigit():
+            raise ValueError(f'Invalid loan id: {value!r}')
+        loan_ids.append(int(value))
+    return list(dict.fromkeys(loan_ids))
+
+
+def _transition_chunk(loan_ids, from_status, to_status, date_column, now):
+    """Move every loan in ``loan_ids`` still in ``from_status``; returns {loan_id: amount}
+
+    A single conditional UPDATE does the check and the write, so a loan moved
+    by someone else in the meantime is simply not matched.
+    """
+    statement = (
+        update(Loan)
+        .where(Loan.loan_id.in_(loan_ids), Loan.status == from_status)
+        .values({'status': to_status, date_column: now, 'version': Loan.version + 1})
+        .execution_options(synchronize_session=False)
+    )
+    if getattr(db.engine.dialect, 'update_returning', False):
+        rows = db.session.execute(statement.returning(Loan.loan_id, Loan.loan_amount)).all()
+        return {loan_id: amount for loan_id, amount in rows}
+
+    # MySQL has no UPDATE ... RETURNING: lock the matching rows first so the
+    # UPDATE touches exactly these
+    rows = db.session.execute(
+        select(Loan.loan_id, Loan.loan_amount)
+        .where(Loan.loan_id.in_(loan_ids), Loan.status == from_status)
+        .with_for_update()
+    ).all()
+    if rows:
+        result = db.session.execute(statement.where(Loan.loan_id.in_([loan_id for loan_id, _ in rows])))
+        if result.rowcount != len(rows):
+            raise RuntimeError('Loans changed while the batch was being applied')
+    return {loan_id: amount for loan_id, amount in rows}
+
+
+def apply_batch(action, loan_ids, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Apply ``action`` to ``loan_ids``, one transaction per chunk
+
+    Returns per-id outcomes: ``updated``, ``not_found``, ``invalid_status``
+    (with the loan's current status) or ``error`` when the chunk failed and
+    was rolled back. The status rollup is moved once per chunk.
+    """
+    rule = TRANSITIONS[action]
+    from_status, to_status, date_column = rule.from_statuses[0], rule.to_status, rule.date_column
+    chunk_size = max(1, chunk_size)
+    results = []
+    for offset in range(0, len(loan_ids), chunk_size):
+        chunk = loan_ids[offset:offset + chunk_size]
+        try:
+            updated = _transition_chunk(chunk, from_status, to_status, date_column, datetime.utcnow())
+            if updated:
+                total = sum((amount or Decimal('0') for amount in updated.values()), Decimal('0'))
+                record_transition(from_status, to_status, total, count=len(updated))
+            skipped = [loan_id for loan_id in chunk if loan_id not in updated]
+            current = dict(db.session.execute(
+                select(Loan.loan_id, Loan.status).where(Loan.loan_id.in_(skipped))
+            ).all()) if skipped else {}
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            results.extend({'loan_id': loan_id, 'outcome': 'error', 'error': str(e)} for loan_id in chunk)
+            continue
+
+        for loan_id in chunk:
+            if loan_id in updated:
+                results.append({'loan_id': loan_id, 'outcome': 'updated', 'status': to_status})
+            elif loan_id in current:
+                results.append({'loan_id': loan_id, 'outcome': 'invalid_status', 'status': current[loan_id]})
+            else:
+                results.append({'loan_id': loan_id, 'outcome': 'not_found'})
+
+    summary = {'updated': 0, 'not_found': 0, 'invalid_status': 0, 'error': 0}
+    for result in results:
+        summary[result['outcome']] += 1
+    return {'action': action, 'summary': summary, 'results': results}
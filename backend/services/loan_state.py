@@ -0,0 +1,61 @@
+"""Loan status transitions as compare-and-swap updates on loans.version
+
+Every transition is a single ``UPDATE loans ... WHERE loan_id = ? AND
+version = ? AND status = ?``. If two requests race on the same loan, one
+matches and the other gets TransitionConflict, and no row lock is held
+between the read and the write.
+"""
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
+
+from models import db, Loan
+from services.stats import record_transition
+
+Transition = namedtuple('Transition', 'from_statuses to_status date_column error')
+
+TRANSITIONS = {
+    'approve': Transition(('Pending',), 'Approved', 'approval_date', 'Only pending loans can be approved'),
+    'reject': Transition(('Pending',), 'Rejected', 'approval_date', 'Only pending loans can be rejected'),
+    'disburse': Transition(('Approved',), 'Active', 'disbursal_date', 'Only approved loans can be disbursed'),
+    'pre_close': Transition(('Active', 'Approved'), 'Closed', 'pre_closure_date',
+                            'Only active or approved loans can be pre-closed'),
+}
+
+
+class InvalidTransition(ValueError):
+    """The loan's current status does not allow the requested action"""
+
+
+class TransitionConflict(RuntimeError):
+    """The loan changed between being read and being updated"""
+
+
+def transition(loan, action, now=None):
+    """Apply ``action`` to ``loan`` (as read by the caller) in the caller's transaction
+
+    Raises InvalidTransition if the status read does not allow it and
+    TransitionConflict if the row no longer has the version read. On success
+    ``loan`` reflects the new state and the status rollup has been moved.
+    """
+    rule = TRANSITIONS[action]
+    if loan.status not in rule.from_statuses:
+        raise InvalidTransition(rule.error)
+
+    now = now or datetime.utcnow()
+    previous_status, version = loan.status, loan.version
+    result = db.session.execute(
+        update(Loan)
+        .where(Loan.loan_id == loan.loan_id, Loan.version == version, Loan.status == previous_status)
+        .values({'status': rule.to_status, rule.date_column: now, 'version': version + 1})
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise TransitionConflict('Loan was modified by another request; reload it and try again')
+
+    for key, value in (('status', rule.to_status), (rule.date_column, now), ('version', version + 1)):
+        set_committed_value(loan, key, value)
+    record_transition(previous_status, rule.to_status, loan.loan_amount)
+    return loan
@@ -0,0 +1,45 @@
+import re
+from functools import lru_cache
+
+from flask import request
+
+# Word boundaries in camelCase / PascalCase keys, keeping acronyms together
+# (monthlyEMI -> monthly_emi, panCardURL -> pan_card_url)
+_CAMEL_BOUNDARY = re.compile(r'(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])')
+_EMAIL = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_LETTER = re.compile(r'[A-Za-z]')
+_DIGIT = re.compile(r'\d')
+
+
+@lru_cache(maxsize=1024)
+def camel_to_snake(name: str) -> str:
+    return _CAMEL_BOUNDARY.sub('_', name).lower()
+
+
+def normalize_keys(d):
+    """Snake-case dict keys at any depth, including dicts inside lists"""
+    if isinstance(d, dict):
+        return {camel_to_snake(k): normalize_keys(v) for k, v in d.items()}
+    if isinstance(d, list):
+        return [normalize_keys(v) for v in d]
+    return d
+
+
+def get_json_normalized() -> dict:
+    """Request JSON body with camelCase keys (from the React frontend) in snake_case"""
+    return normalize_keys(request.get_json(silent=True) or {})
+
+
+def validate_email(email):
+    return _EMAIL.match(email) is not None
+
+
+def validate_password(password):
+    # Password must be at least 8 characters with at least one letter and one number
+    if len(password) < 8:
+        return False
+    if not _LETTER.search(password):
+        return False
+    if not _DIGIT.search(password):
+        return False
+    return True
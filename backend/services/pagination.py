@@ -0,0 +1,93 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_CHUNK_SIZE = 1000
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(application_date, loan_id):
+    """Encode the (application_date, loan_id) keyset position as an opaque token"""
+    payload = json.dumps([application_date.isoformat() if application_date else None, loan_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a token produced by encode_cursor back into (application_date, loan_id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        application_date, loan_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(application_date), int(loan_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+
+
+def parse_limit(value):
+    """Clamp a requested page size to [1, MAX_PAGE_SIZE]"""
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(value, MAX_PAGE_SIZE))
+
+
+def apply_loan_keyset(query, model, cursor):
+    """Order loans newest first and seek past the cursor position"""
+    if cursor:
+        query = _seek_past(query, model, *decode_cursor(cursor))
+    return query.order_by(model.application_date.desc(), model.loan_id.desc())
+
+
+def _seek_past(query, model, application_date, loan_id):
+    return query.filter(or_(
+        model.application_date < application_date,
+        and_(model.application_date == application_date, model.loan_id < loan_id)
+    ))
+
+
+def paginate_loans(query, model, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Fetch one keyset page, returning (rows, next_cursor)"""
+    rows = apply_loan_keyset(query, model, cursor).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.application_date, last.loan_id)
+    return rows, next_cursor
+
+
+def stream_ndjson(query, model, serialize_chunk, cursor=None, chunk_size=STREAM_CHUNK_SIZE):
+    """NDJSON generator over every loan in ``query`` past ``cursor``, newest first
+
+    Each chunk is its own buffered keyset query rather than one server-side
+    cursor: with an unbuffered cursor open, the queries ``serialize_chunk``
+    runs for related rows would share its connection, and pymysql would end
+    the export after the first chunk. ``serialize_chunk`` receives each chunk
+    as a list so related rows are loaded once per chunk rather than once per
+    row. The cursor is decoded here, so InvalidCursor is raised before any
+    output is produced.
+    """
+    ordered = query.order_by(model.application_date.desc(), model.loan_id.desc())
+    position = decode_cursor(cursor) if cursor else None
+
+    def generate(position):
+        while True:
+            page = _seek_past(ordered, model, *position) if position else ordered
+            rows = page.limit(chunk_size).all()
+            if not rows:
+                return
+            position = (rows[-1].application_date, rows[-1].loan_id)
+            yield _ndjson_lines(serialize_chunk(rows))
+            if len(rows) < chunk_size:
+                return
+
+    return generate(position)
+
+
+def _ndjson_lines(items):
+    return ''.join(json.dumps(item) + '\n' for item in items)
@@ -0,0 +1,79 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHOD = 'pbkdf2:sha256:600000'
+
+
+class HashingBusy(RuntimeError):
+    """Raised when the password hashing pool is saturated"""
+
+
+class PasswordHasher:
+    """Password hashing with configurable cost, run on a bounded worker pool
+
+    Hash verification is CPU-bound, so it is handed to a small thread (or
+    process) pool instead of running on the request thread. At most
+    ``workers + queue_size`` jobs may be outstanding; beyond that callers
+    wait up to ``timeout`` seconds and then get HashingBusy, so a login flood
+    degrades into fast 503s instead of stalling every worker.
+    """
+
+    def __init__(self):
+        self.method = DEFAULT_METHOD
+        self.salt_length = 16
+        self.timeout = 10
+        self._prefix = None
+        self._executor = None
+        self._slots = None
+
+    def init_app(self, app):
+        self.method = app.config.setdefault('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        self.salt_length = app.config.setdefault('PASSWORD_HASH_SALT_LENGTH', 16)
+        self.timeout = app.config.setdefault('PASSWORD_HASH_TIMEOUT', 10)
+        workers = app.config.setdefault('PASSWORD_HASH_WORKERS', 4)
+        queue_size = app.config.setdefault('PASSWORD_HASH_QUEUE', 32)
+        executor_class = ProcessPoolExecutor if app.config.setdefault('PASSWORD_HASH_EXECUTOR', 'thread') == 'process' \
+            else ThreadPoolExecutor
+        self._prefix = None
+        self._executor = executor_class(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        app.extensions['password_hasher'] = self
+
+    @property
+    def prefix(self):
+        """Normalized method string werkzeug writes in front of new hashes"""
+        if self._prefix is None:
+            self._prefix = generate_password_hash('', method=self.method, salt_length=1).split('$', 1)[0]
+        return self._prefix
+
+    def _run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HashingBusy('Password hashing is busy, try again shortly')
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the hash actually finishes, even if this
+        # caller stops waiting, so the pool can never be oversubscribed
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HashingBusy('Password hashing is busy, try again shortly')
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split('$', 1)[0] != self.prefix
+
+
+hasher = PasswordHasher()
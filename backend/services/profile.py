@@ -0,0 +1,78 @@
+import hashlib
+
+from models import db, PersonalDetails, FinancialDetails, EmploymentDetails, UserDocuments
+
+PROFILE_SECTIONS = {
+    'financial_details': FinancialDetails,
+    'employment_details': EmploymentDetails,
+    'user_documents': UserDocuments
+}
+
+
+def parse_fields(value):
+    """Parse a ``fields=`` projection into {key: None or set of sub-keys}
+
+    ``fields=full_name,email,financial_details.monthly_emi,user_documents``
+    selects two personal fields, one financial field and the whole documents
+    section. An empty value means the full profile (None).
+    """
+    if not value:
+        return None
+    fields = {}
+    for item in value.split(','):
+        key, _, sub_key = item.strip().partition('.')
+        if not key:
+            continue
+        if sub_key and key in PROFILE_SECTIONS:
+            if key not in fields:
+                fields[key] = set()
+            if fields[key] is not None:
+                fields[key].add(sub_key)
+        else:
+            fields[key] = None
+    return fields
+
+
+def load_profile(user_id, fields=None):
+    """Fetch a user and the requested related sections with one joined query
+
+    Returns (user, {section: row or None}) or (None, {}) if the user is gone.
+    Sections the projection leaves out are not joined at all.
+    """
+    sections = [name for name in PROFILE_SECTIONS if fields is None or name in fields]
+    query = db.session.query(PersonalDetails, *(PROFILE_SECTIONS[name] for name in sections))
+    for name in sections:
+        model = PROFILE_SECTIONS[name]
+        query = query.outerjoin(model, model.user_id == PersonalDetails.user_id)
+    row = query.filter(PersonalDetails.user_id == user_id).first()
+    if row is None:
+        return None, {}
+    if not sections:
+        return row, {}
+    return row[0], dict(zip(sections, row[1:]))
+
+
+def profile_etag(user, related, fields=None):
+    """Version tag built from the rows' updated_at columns, without serializing them"""
+    parts = [str(user.user_id), user.updated_at.isoformat() if user.updated_at else '']
+    for name, row in sorted(related.items()):
+        parts.append(f"{name}:{row.id}:{row.updated_at.isoformat() if row.updated_at else ''}" if row else f'{name}:-')
+    if fields is not None:
+        parts.append(repr(sorted((key, sorted(sub_keys) if sub_keys else None) for key, sub_keys in fields.items())))
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def serialize_profile(user, related, fields=None):
+    profile = user.to_dict()
+    for name, row in related.items():
+        if row is not None:
+            profile[name] = row.to_dict()
+    if fields is None:
+        return profile
+    projected = {}
+    for key, sub_keys in fields.items():
+        if key not in profile:
+            continue
+        value = profile[key]
+        projected[key] = {k: value[k] for k in sub_keys if k in value} if sub_keys else value
+    return projected
@@ -0,0 +1,249 @@
+"""Data-driven eligibility rules
+
+Criteria are written one rule per line (or separated by ``;``)::
+
+    age >= 21 : Minimum age requirement not met (21 years)
+    debt_to_income <= 40 : Debt-to-income ratio too high ({debt_to_income:.1f}%) | Reduce existing debt
+
+Each rule is a boolean expression over the applicant variables, optionally
+followed by ``: reason`` and ``| recommendation`` reported when it fails.
+Messages may reference the variables as ``{name}`` or ``{name:spec}``; a
+message with any other placeholder is reported as written.
+Expressions support ``and``, ``or``, ``not``, parentheses, the comparison
+operators and ``in (...)``. Rules compile once into closures that work on
+scalars (online checks) and NumPy arrays (batch scoring) alike.
+"""
+import logging
+import operator
+import re
+import string
+from functools import lru_cache
+
+import numpy as np
+
+from services.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+VARIABLES = ('age', 'employment_status', 'total_monthly_income', 'monthly_emi', 'debt_to_income', 'active_loans')
+
+DEFAULT_CRITERIA = """
+age >= 21 : Minimum age requirement not met (21 years)
+employment_status != 'Student' or total_monthly_income >= 10000 : Minimum monthly income not met
+employment_status != 'Unemployed' : Unemployed applicants are not eligible
+total_monthly_income >= 20000 : Monthly income below minimum requirement (₹20,000) | Increase your monthly income
+debt_to_income <= 40 : Debt-to-income ratio too high ({debt_to_income:.1f}%) | Reduce existing debt
+active_loans < 3 : Maximum number of active loans reached (3)
+"""
+
+# Stand-in values used to check message templates when rules are compiled
+_SAMPLE_ENV = {name: 0.0 for name in VARIABLES}
+_SAMPLE_ENV['employment_status'] = 'Employed'
+
+_COMPARISONS = {
+    '>=': operator.ge, '<=': operator.le, '>': operator.gt,
+    '<': operator.lt, '==': operator.eq, '!=': operator.ne
+}
+_TOKEN = re.compile(r"""\s*(?:(?P<number>-?\d+(?:\.\d+)?)|(?P<string>'[^']*'|"[^"]*")|(?P<op>>=|<=|==|!=|>|<|\(|\)|,)|(?P<word>[A-Za-z_][A-Za-z0-9_]*))""")
+
+
+class RuleSyntaxError(ValueError):
+    """Raised when eligibility criteria cannot be parsed"""
+
+
+class Rule:
+    __slots__ = ('source', 'predicate', 'reason', 'recommendation')
+
+    def __init__(self, source, predicate, reason, recommendation):
+        self.source = source
+        self.predicate = predicate
+        self.reason = reason
+        self.recommendation = recommendation
+
+
+class RuleSet:
+    """An ordered list of compiled rules; every rule must pass"""
+
+    def __init__(self, rules):
+        self.rules = rules
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def evaluate(self, env):
+        """Check one applicant; returns (eligible, reasons, recommendations)"""
+        reasons, recommendations = [], []
+        for rule in self.rules:
+            if not rule.predicate(env):
+                reasons.append(_render(rule.reason, env))
+                if rule.recommendation:
+                    recommendations.append(_render(rule.recommendation, env))
+        return not reasons, reasons, recommendations
+
+    def mask(self, env):
+        """Check a batch of applicants held as arrays; returns a boolean array"""
+        result = np.ones(len(env['age']), dtype=bool)
+        for rule in self.rules:
+            result &= np.asarray(rule.predicate(env), dtype=bool)
+        return result
+
+
+class _Parser:
+    def __init__(self, text):
+        self.tokens = self._tokenize(text)
+        self.position = 0
+
+    @staticmethod
+    def _tokenize(text):
+        tokens, position = [], 0
+        text = text.rstrip()
+        while position < len(text):
+            match = _TOKEN.match(text, position)
+            if not match or match.end() == position:
+                raise RuleSyntaxError(f'Unexpected input at: {text[position:]!r}')
+            kind = match.lastgroup
+            tokens.append((kind, match.group(kind)))
+            position = match.end()
+        return tokens
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        token = self.peek()
+        if token[0] is None or (kind and token[0] != kind) or (value and token[1] != value):
+            raise RuleSyntaxError(f'Expected {value or kind}, found {token[1]!r}')
+        self.position += 1
+        return token[1]
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek()[0] is not None:
+            raise RuleSyntaxError(f'Unexpected token {self.peek()[1]!r}')
+        return node
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.peek() == ('word', 'or'):
+            self.take()
+            left, right = node, self.parse_and()
+            node = lambda env, l=left, r=right: np.logical_or(l(env), r(env))
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.peek() == ('word', 'and'):
+            self.take()
+            left, right = node, self.parse_not()
+            node = lambda env, l=left, r=right: np.logical_and(l(env), r(env))
+        return node
+
+    def parse_not(self):
+        if self.peek() == ('word', 'not'):
+            self.take()
+            inner = self.parse_not()
+            return lambda env: np.logical_not(inner(env))
+        if self.peek() == ('op', '('):
+            self.take()
+            node = self.parse_or()
+            self.take('op', ')')
+            return node
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        name = self.take('word')
+        if name not in VARIABLES:
+            raise RuleSyntaxError(f'Unknown variable {name!r}')
+        if self.peek() == ('word', 'in'):
+            self.take()
+            self.take('op', '(')
+            values = [self.parse_value()]
+            while self.peek() == ('op', ','):
+                self.take()
+                values.append(self.parse_value())
+            self.take('op', ')')
+            return lambda env: np.isin(env[name], values)
+        compare = _COMPARISONS.get(self.take('op'))
+        if compare is None:
+            raise RuleSyntaxError(f'Expected a comparison after {name!r}')
+        value = self.parse_value()
+        return lambda env: compare(env[name], value)
+
+    def parse_value(self):
+        kind, value = self.peek()
+        if kind == 'number':
+            self.take()
+            return float(value)
+        if kind == 'string':
+            self.take()
+            return value[1:-1]
+        raise RuleSyntaxError(f'Expected a number or quoted string, found {value!r}')
+
+
+def _message_template(text):
+    """``text`` as a format template if it only uses plain variable placeholders
+
+    Anything else (a stray brace, an unknown name, attribute or index access,
+    a bad format spec) is escaped so the message is shown literally instead
+    of failing every evaluation of the rule.
+    """
+    try:
+        fields = [field for _, field, _, _ in string.Formatter().parse(text) if field is not None]
+        if all(field in VARIABLES for field in fields):
+            text.format_map(_SAMPLE_ENV)
+            return text
+    except (KeyError, ValueError, IndexError, TypeError):
+        pass
+    logger.warning(f'Eligibility message shown literally, it has invalid placeholders: {text!r}')
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+def _render(template, env):
+    try:
+        return template.format_map(env)
+    except (KeyError, ValueError, IndexError, TypeError):
+        # e.g. a variable missing from env or None where the spec wants a number
+        return template.replace('{{', '{').replace('}}', '}')
+
+
+@lru_cache(maxsize=512)
+def compile_rules(text):
+    """Parse criteria text into a RuleSet (memoized on the text itself)"""
+    rules = []
+    for line in re.split(r'[\n;]', text or ''):
+        line = line.strip()
+        if not line:
+            continue
+        expression, _, message = line.partition(':')
+        reason, _, recommendation = message.partition('|')
+        rules.append(Rule(
+            expression.strip(),
+            _Parser(expression).parse(),
+            _message_template(reason.strip()) or f'Eligibility rule not met: {expression.strip()}',
+            _message_template(recommendation.strip()) or None
+        ))
+    return RuleSet(rules)
+
+
+DEFAULT_RULES = compile_rules(DEFAULT_CRITERIA)
+
+_product_rules = LRUCache(maxsize=1024, ttl=0)
+
+
+def product_rules(product):
+    """Compiled extra rules from a product's ``eligibility_criteria``
+
+    ``product`` is a LoanProduct.to_dict(); the compiled set is cached per
+    loan_product_id and recompiled when ``updated_at`` changes. Criteria that
+    do not parse (legacy free text) contribute no rules.
+    """
+    cached = _product_rules.get(product['loan_product_id'])
+    if cached is not None and cached[0] == product['updated_at']:
+        return cached[1]
+    try:
+        rules = compile_rules(product.get('eligibility_criteria') or '')
+    except RuleSyntaxError as e:
+        logger.warning(f"Ignoring eligibility criteria for product {product['loan_product_id']}: {str(e)}")
+        rules = RuleSet([])
+    _product_rules.set(product['loan_product_id'], (product['updated_at'], rules))
+    return rules
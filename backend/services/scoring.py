@@ -0,0 +1,189 @@
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import date, datetime
+
+import numpy as np
+from sqlalchemy import func, insert
+
+from models import db, PersonalDetails, FinancialDetails, EmploymentDetails, Loan, LoanProduct, PreapprovedOffer
+from services.emi import annuity_factor
+from services.rules import DEFAULT_RULES, RuleSyntaxError, compile_rules
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def iter_applicant_chunks(chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream applicants with their financial/employment data as column arrays
+
+    Users are walked in user_id order with keyset pagination, so each chunk
+    is one indexed range query regardless of table size.
+    """
+    active_loans = db.session.query(func.count(Loan.loan_id)).filter(
+        Loan.user_id == PersonalDetails.user_id, Loan.status == 'Active'
+    ).correlate(PersonalDetails).scalar_subquery()
+    last_user_id = 0
+    while True:
+        rows = db.session.query(
+            PersonalDetails.user_id,
+            PersonalDetails.date_of_birth,
+            EmploymentDetails.employment_status,
+            EmploymentDetails.monthly_income,
+            EmploymentDetails.other_income,
+            FinancialDetails.monthly_emi,
+            active_loans
+        ).join(
+            FinancialDetails, FinancialDetails.user_id == PersonalDetails.user_id
+        ).join(
+            EmploymentDetails, EmploymentDetails.user_id == PersonalDetails.user_id
+        ).filter(
+            PersonalDetails.user_id > last_user_id
+        ).order_by(PersonalDetails.user_id).limit(chunk_size).all()
+        if not rows:
+            return
+        last_user_id = rows[-1][0]
+        yield {
+            'user_id': np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)),
+            'dob_ordinal': np.fromiter((r[1].toordinal() if r[1] else -1 for r in rows), dtype=np.int64, count=len(rows)),
+            'employment_status': np.array([r[2] or '' for r in rows]),
+            'total_monthly_income': np.fromiter(
+                (float(r[3] or 0) + float(r[4] or 0) for r in rows), dtype=np.float64, count=len(rows)
+            ),
+            'monthly_emi': np.fromiter((float(r[5] or 0) for r in rows), dtype=np.float64, count=len(rows)),
+            'active_loans': np.fromiter((r[6] or 0 for r in rows), dtype=np.int64, count=len(rows))
+        }
+
+
+def load_product_arrays(tenure_months):
+    """Catalogue columns plus each product's annuity factor for ``tenure_months``"""
+    products = [p for p in LoanProduct.query.order_by(LoanProduct.loan_product_id).all() if p.interest_rate is not None]
+    return {
+        'loan_product_id': np.array([p.loan_product_id for p in products], dtype=np.int64),
+        'annuity_factor': np.array([annuity_factor(p.interest_rate, tenure_months) for p in products], dtype=np.float64),
+        'min_amount': np.array([float(p.min_amount) if p.min_amount is not None else -np.inf for p in products]),
+        'max_amount': np.array([float(p.max_amount) if p.max_amount is not None else np.inf for p in products]),
+        'criteria': [p.eligibility_criteria or '' for p in products]
+    }
+
+
+def score_chunk(applicants, products, today_ordinal):
+    """Evaluate the eligibility rules for a chunk of applicants against every product
+
+    Uses the same compiled rules as the online check (services.rules), applied
+    to NumPy arrays. Returns (user_ids, loan_product_ids,
+    maximum_eligible_amounts) for the eligible pairs only.
+    """
+    income = applicants['total_monthly_income']
+    emi = applicants['monthly_emi']
+    dob = applicants['dob_ordinal']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        env = {
+            'age': np.where(dob >= 0, (today_ordinal - dob) // 365, np.inf),
+            'employment_status': applicants['employment_status'],
+            'total_monthly_income': income,
+            'monthly_emi': emi,
+            'debt_to_income': np.where(income > 0, emi / income * 100, 0.0),
+            'active_loans': applicants['active_loans']
+        }
+    eligible = DEFAULT_RULES.mask(env)
+
+    max_monthly_emi = (income - emi) * 0.4
+    eligible &= max_monthly_emi > 0
+
+    amounts = np.minimum(max_monthly_emi[:, None] * products['annuity_factor'][None, :], products['max_amount'][None, :])
+    offers = eligible[:, None] & (amounts >= products['min_amount'][None, :])
+    for column, criteria in enumerate(products['criteria']):
+        try:
+            rules = compile_rules(criteria)
+        except RuleSyntaxError:
+            continue
+        if rules:
+            offers[:, column] &= rules.mask(env)
+    rows, cols = np.nonzero(offers)
+    return applicants['user_id'][rows], products['loan_product_id'][cols], amounts[rows, cols]
+
+
+def _write_offers(run_id, tenure_months, scored):
+    user_ids, product_ids, amounts = scored
+    if len(user_ids) == 0:
+        return 0
+    now = datetime.utcnow()
+    db.session.execute(insert(PreapprovedOffer), [
+        {
+            'run_id': run_id,
+            'user_id': user_id,
+            'loan_product_id': product_id,
+            'maximum_eligible_amount': round(amount, 2),
+            'tenure_months': tenure_months,
+            'created_at': now
+        }
+        for user_id, product_id, amount in zip(user_ids.tolist(), product_ids.tolist(), amounts.tolist())
+    ])
+    db.session.commit()
+    return len(user_ids)
+
+
+def run_scoring(chunk_size=DEFAULT_CHUNK_SIZE, workers=None, tenure_months=12, replace=True):
+    """Score every applicant against every product and store the offers
+
+    Chunks are read in the calling process, scored in a process pool and
+    written back under a new run_id with one executemany per chunk. With
+    ``replace`` the previous runs' offers are deleted only once the new run
+    is complete, in one final transaction. The old offers stay available
+    while scoring runs (next to the partial new run; readers wanting a single
+    run should take each user's newest ``created_at``), and a failed run is
+    removed again, leaving them untouched.
+    Returns throughput stats.
+    """
+    started = time.perf_counter()
+    run_id = uuid.uuid4().hex
+    products = load_product_arrays(tenure_months)
+    today_ordinal = date.today().toordinal()
+    try:
+        users, offers = _score_all(run_id, products, today_ordinal, chunk_size, workers, tenure_months)
+    except BaseException:
+        db.session.rollback()
+        # Drop whatever part of this run was already committed
+        PreapprovedOffer.query.filter(PreapprovedOffer.run_id == run_id).delete(synchronize_session=False)
+        db.session.commit()
+        raise
+    if replace:
+        PreapprovedOffer.query.filter(PreapprovedOffer.run_id != run_id).delete(synchronize_session=False)
+        db.session.commit()
+
+    elapsed = time.perf_counter() - started
+    pairs = users * len(products['loan_product_id'])
+    return {
+        'run_id': run_id,
+        'users': users,
+        'products': len(products['loan_product_id']),
+        'pairs_evaluated': pairs,
+        'offers_written': offers,
+        'seconds': round(elapsed, 3),
+        'users_per_second': round(users / elapsed, 1) if elapsed else None,
+        'pairs_per_second': round(pairs / elapsed, 1) if elapsed else None
+    }
+
+
+def _score_all(run_id, products, today_ordinal, chunk_size, workers, tenure_months):
+    workers = workers or os.cpu_count() or 1
+    users = offers = 0
+    if workers == 1 or len(products['loan_product_id']) == 0:
+        for chunk in iter_applicant_chunks(chunk_size):
+            users += len(chunk['user_id'])
+            offers += _write_offers(run_id, tenure_months, score_chunk(chunk, products, today_ordinal))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            max_in_flight = 2 * workers
+            pending = set()
+            for chunk in iter_applicant_chunks(chunk_size):
+                users += len(chunk['user_id'])
+                pending.add(pool.submit(score_chunk, chunk, products, today_ordinal))
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        offers += _write_offers(run_id, tenure_months, future.result())
+            for future in pending:
+                offers += _write_offers(run_id, tenure_months, future.result())
+    return users, offers
@@ -0,0 +1,37 @@
+from sqlalchemy.orm import joinedload
+
+from models import db, Loan, LoanProduct
+
+
+def with_loan_relations(query):
+    """Join the product and bank that Loan.to_dict reads into the loan query"""
+    return query.options(joinedload(Loan.loan_product).joinedload(LoanProduct.bank))
+
+
+def preload_loan_relations(loans):
+    """Load products/banks for already-fetched loans in one query
+
+    The rows land in the session identity map, so the many-to-one lazy loads
+    in Loan.to_dict resolve without emitting SQL. The identity map only holds
+    weak references, so callers must keep the returned products alive while
+    serializing.
+    """
+    session = db.session
+    missing = {
+        loan.loan_product_id for loan in loans
+        if session.identity_map.get(session.identity_key(LoanProduct, loan.loan_product_id)) is None
+    }
+    if not missing:
+        return []
+    return LoanProduct.query.options(joinedload(LoanProduct.bank)).filter(
+        LoanProduct.loan_product_id.in_(missing)
+    ).all()
+
+
+def serialize_loans(loans):
+    """Serialize a list of loans without per-row lazy loads"""
+    # Held until the rows are built so the preloaded products are not collected
+    products = preload_loan_relations(loans)
+    rows = [loan.to_dict() for loan in loans]
+    del products
+    return rows
@@ -0,0 +1,220 @@
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Loan, LoanStatsRollup, LoanApplicationDaily
+
+logger = logging.getLogger(__name__)
+
+LOAN_STATUSES = ('Pending', 'Approved', 'Rejected', 'Active', 'Closed')
+GRANULARITIES = ('day', 'week', 'month')
+# Window used when ``start`` is omitted, and the widest window served
+DEFAULT_TREND_DAYS = {'day': 30, 'week': 7 * 12, 'month': 365}
+MAX_TREND_DAYS = 366 * 5
+
+
+def aggregate_by_status():
+    """Count and sum loans per status with a single GROUP BY"""
+    rows = db.session.query(
+        Loan.status, func.count(Loan.loan_id), func.sum(Loan.loan_amount)
+    ).group_by(Loan.status).all()
+    totals = {status: (0, Decimal('0')) for status in LOAN_STATUSES}
+    for status, count, amount in rows:
+        totals[status] = (count, amount or Decimal('0'))
+    return totals
+
+
+def rebuild_rollup():
+    """Recompute loan_stats_rollup from the loans table, one row per status
+
+    Run from database/migrations/006_loan_stats_rollup.sql or ``flask
+    rebuild-loan-stats``, never on the request path: a loan changed while the
+    rebuild runs would be missed by both the snapshot and record_transition.
+    """
+    LoanStatsRollup.query.delete()
+    for status, (count, amount) in aggregate_by_status().items():
+        db.session.add(LoanStatsRollup(status=status, loan_count=count, total_amount=amount))
+    db.session.flush()
+
+
+def read_rollup():
+    """Return {status: (count, total_amount)}
+
+    Until the rollup has been seeded this falls back to a live GROUP BY
+    rather than seeding it here, where concurrent first reads would race.
+    """
+    rows = LoanStatsRollup.query.all()
+    if not rows:
+        return aggregate_by_status()
+    return {row.status: (row.loan_count, row.total_amount or Decimal('0')) for row in rows}
+
+
+def record_transition(old_status, new_status, amount, count=1):
+    """Move ``count`` loans worth ``amount`` from one status bucket to another
+
+    Runs in the caller's transaction so the rollup commits (or rolls back)
+    together with the loan change. ``old_status`` is None for new loans.
+    Does nothing until the rollup has been seeded.
+    """
+    amount = Decimal(str(amount or 0))
+    if old_status:
+        _bump(old_status, -count, -amount)
+    if new_status:
+        _bump(new_status, count, amount)
+
+
+def _bump(status, count, amount):
+    # Every status row is written by rebuild_rollup, so there is nothing to
+    # insert here. A decrement that would take a bucket below zero means the
+    # rollup has drifted from the loans table: it is cleared, so read_rollup
+    # falls back to the live GROUP BY until rebuild_rollup runs again
+    new_count = LoanStatsRollup.loan_count + count
+    new_amount = LoanStatsRollup.total_amount + amount
+    statement = update(LoanStatsRollup).where(LoanStatsRollup.status == status).values(
+        loan_count=new_count, total_amount=new_amount
+    )
+    decrement = count < 0 or amount < 0
+    if decrement:
+        statement = statement.where(new_count >= 0, new_amount >= 0)
+    if db.session.execute(statement).rowcount or not decrement:
+        return
+    if db.session.query(LoanStatsRollup.status).filter(LoanStatsRollup.status == status).first() is None:
+        # Not seeded yet
+        return
+    logger.warning(
+        f"Loan stats rollup drifted: {status} would go below zero; clearing it until "
+        f"`flask rebuild-loan-stats` runs"
+    )
+    LoanStatsRollup.query.delete(synchronize_session=False)
+
+
+def month_range(moment):
+    """Half-open [first of month, first of next month) around ``moment``
+
+    Comparing application_date against a range (rather than extract()ing its
+    month and year) lets the database use an index on the column.
+    """
+    start = datetime(moment.year, moment.month, 1)
+    end = datetime(moment.year + moment.month // 12, moment.month % 12 + 1, 1)
+    return start, end
+
+
+def count_applications(start, end):
+    """Loans applied for in [start, end), straight from the loans table"""
+    return db.session.query(func.count(Loan.loan_id)).filter(
+        Loan.application_date >= start, Loan.application_date < end
+    ).scalar()
+
+
+def _aggregate_daily(start=None, end=None):
+    """{day: (count, amount)} computed from the loans table, optionally for days in [start, end)"""
+    day = func.date(Loan.application_date)
+    query = db.session.query(day, func.count(Loan.loan_id), func.sum(Loan.loan_amount)).filter(
+        Loan.application_date.isnot(None)
+    )
+    if start is not None:
+        query = query.filter(Loan.application_date >= start, Loan.application_date < end)
+    return {
+        # SQLite returns DATE() as text
+        value if isinstance(value, date) else date.fromisoformat(value): (count, amount or Decimal('0'))
+        for value, count, amount in query.group_by(day).all()
+    }
+
+
+def rebuild_daily_counts():
+    """Recompute loan_application_daily from the loans table
+
+    Run from database/migrations/003_loan_application_daily.sql or ``flask
+    rebuild-loan-stats``, never on the request path.
+    """
+    LoanApplicationDaily.query.delete()
+    rows = _aggregate_daily()
+    if rows:
+        db.session.execute(insert(LoanApplicationDaily), [
+            {'day': day, 'application_count': count, 'total_amount': amount, 'updated_at': datetime.utcnow()}
+            for day, (count, amount) in rows.items()
+        ])
+    db.session.flush()
+
+
+def record_application(amount, moment=None):
+    """Count one new application in today's bucket, in the caller's transaction"""
+    day = (moment or datetime.utcnow()).date()
+    amount = Decimal(str(amount or 0))
+    increment = (
+        update(LoanApplicationDaily)
+        .where(LoanApplicationDaily.day == day)
+        .values(
+            application_count=LoanApplicationDaily.application_count + 1,
+            total_amount=LoanApplicationDaily.total_amount + amount
+        )
+    )
+    if db.session.execute(increment).rowcount or LoanApplicationDaily.query.first() is None:
+        # Counted, or the table has not been seeded yet and reads still come from loans
+        return
+    try:
+        # First application of the day; a concurrent request may insert the row first
+        with db.session.begin_nested():
+            db.session.add(LoanApplicationDaily(day=day, application_count=1, total_amount=amount))
+    except IntegrityError:
+        db.session.execute(increment)
+
+
+def _daily_counts(start, end):
+    """{day: (count, amount)} for days in [start, end)
+
+    Until loan_application_daily has been seeded this falls back to a GROUP
+    BY over the range in loans, like read_rollup().
+    """
+    if LoanApplicationDaily.query.first() is None:
+        return _aggregate_daily(start, end)
+    rows = db.session.query(
+        LoanApplicationDaily.day, LoanApplicationDaily.application_count, LoanApplicationDaily.total_amount
+    ).filter(LoanApplicationDaily.day >= start, LoanApplicationDaily.day < end).all()
+    return {day: (count, amount or Decimal('0')) for day, count, amount in rows}
+
+
+def _bucket_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(start, granularity):
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start + timedelta(days=1)
+
+
+def application_trend(start, end, granularity='day'):
+    """Applications per day/week (Monday)/month for days in [start, end)
+
+    Reads at most one row per day from loan_application_daily; empty buckets
+    are reported as zero so the series is continuous. A bucket cut short by
+    ``start`` is labelled with ``start``, not its calendar start.
+    """
+    counts = _daily_counts(start, end)
+    buckets = {}
+    for day, (count, amount) in counts.items():
+        key = _bucket_start(day, granularity)
+        total_count, total_amount = buckets.get(key, (0, Decimal('0')))
+        buckets[key] = (total_count + count, total_amount + amount)
+
+    series = []
+    bucket = _bucket_start(start, granularity)
+    while bucket < end:
+        count, amount = buckets.get(bucket, (0, Decimal('0')))
+        series.append({
+            'period_start': max(bucket, start).isoformat(),
+            'applications': count,
+            'total_amount': float(amount)
+        })
+        bucket = _next_bucket(bucket, granularity)
+    return series
@@ -0,0 +1,294 @@
+import codecs
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import repeat
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError, OperationalError
+from werkzeug.security import generate_password_hash
+
+from models import db, PersonalDetails, FinancialDetails, EmploymentDetails
+from services.normalize import normalize_keys, validate_email, validate_password
+from services.passwords import hasher
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# Columns are NOT NULL on personal_details, so rows without them are rejected
+# up front instead of failing the whole chunk's insert
+REQUIRED_FIELDS = (
+    'full_name', 'email', 'contact_number', 'password', 'gender', 'marital_status', 'nationality',
+    'date_of_birth', 'permanent_address'
+)
+EMPLOYMENT_STATUSES = EmploymentDetails.__table__.c.employment_status.type.enums
+# VARCHAR limits, so over-long values are row errors rather than a strict-mode failure
+MAX_LENGTHS = {
+    column.name: column.type.length
+    for model in (PersonalDetails, FinancialDetails, EmploymentDetails)
+    for column in model.__table__.columns
+    if isinstance(column.type, db.String) and column.type.length
+}
+# DECIMAL(15, 2) money columns
+MAX_AMOUNT = Decimal('1e13')
+# What a bad value or a racing duplicate raises on insert (MySQL strict mode
+# reports some bad values as OperationalError)
+ROW_INSERT_ERRORS = (IntegrityError, DataError, OperationalError)
+
+
+class ImportRowError(ValueError):
+    """Raised for a row that cannot be imported"""
+
+
+def iter_rows(stream, fmt):
+    """Yield (row_number, dict) from a binary CSV or NDJSON stream
+
+    Rows are decoded lazily so arbitrarily large uploads are never held in
+    memory. Unparseable NDJSON lines and CSV rows with more fields than the
+    header are yielded as ImportRowError instances.
+    """
+    text = codecs.getreader('utf-8-sig')(stream)
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            # DictReader files surplus values under a None key
+            if None in row:
+                yield reader.line_num, ImportRowError('Row has more fields than the header')
+                continue
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, ImportRowError(f'Invalid JSON: {str(e)}')
+            continue
+        yield line_number, row if isinstance(row, dict) else ImportRowError('Each line must be a JSON object')
+
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _decimal(row, field, default=None):
+    value = _text(row.get(field))
+    if value is None:
+        return default
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise ImportRowError(f'{field} must be a number')
+    if not amount.is_finite() or abs(amount) >= MAX_AMOUNT:
+        raise ImportRowError(f'{field} is out of range')
+    return amount
+
+
+def _check_lengths(values):
+    for field, value in values.items():
+        limit = MAX_LENGTHS.get(field)
+        if limit and isinstance(value, str) and len(value) > limit:
+            raise ImportRowError(f'{field} must be at most {limit} characters')
+
+
+def _date(value):
+    try:
+        if 'T' in value:
+            return datetime.fromisoformat(value).date()
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ImportRowError('Invalid date format for date_of_birth. Use YYYY-MM-DD')
+
+
+def parse_row(row):
+    """Validate one import row with the registration rules
+
+    Returns (personal, financial, employment, password); financial and
+    employment are None when the row carries no such details.
+    """
+    row = {key: _text(value) for key, value in normalize_keys(row).items()}
+    row['contact_number'] = row.get('contact_number') or row.get('phone')  # handle both
+    row['permanent_address'] = row.get('permanent_address') or row.get('address')
+    for field in REQUIRED_FIELDS:
+        if not row.get(field):
+            raise ImportRowError(f'{field} is required')
+    email = row['email']
+    if not validate_email(email):
+        raise ImportRowError('Invalid email format')
+    if not validate_password(row['password']):
+        raise ImportRowError('Password must be at least 8 characters with at least one letter and one number')
+
+    personal = {
+        'full_name': row['full_name'],
+        'email': email,
+        'contact_number': row['contact_number'],
+        'date_of_birth': _date(row['date_of_birth']),
+        'gender': row['gender'],
+        'nationality': row['nationality'],
+        'marital_status': row['marital_status'],
+        'permanent_address': row['permanent_address']
+    }
+
+    financial = None
+    if row.get('bank_account_details'):
+        financial = {
+            'existing_loans': _decimal(row, 'existing_loans', 0),
+            'monthly_emi': _decimal(row, 'monthly_emi', 0),
+            'assets_owned': row.get('assets_owned'),
+            'bank_account_details': row['bank_account_details']
+        }
+
+    employment = None
+    if row.get('employment_status'):
+        if row['employment_status'] not in EMPLOYMENT_STATUSES:
+            raise ImportRowError(f"employment_status must be one of {', '.join(EMPLOYMENT_STATUSES)}")
+        employment = {
+            'employment_status': row['employment_status'],
+            'employer_name_address': row.get('employer_name_address'),
+            'job_title': row.get('job_title'),
+            'monthly_income': _decimal(row, 'monthly_income', 0),
+            'other_income': _decimal(row, 'other_income', 0)
+        }
+    for values in (personal, financial, employment):
+        if values:
+            _check_lengths(values)
+    return personal, financial, employment, row['password']
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    def error(self, row_number, message, email=None):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'email': email, 'error': message})
+
+    def to_dict(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'failed': self.error_count,
+            'seconds': round(elapsed, 3),
+            'rows_per_second': round(self.rows / elapsed, 1) if elapsed else None,
+            'errors': sorted(self.errors, key=lambda error: error['row']),
+            'errors_truncated': self.error_count > len(self.errors)
+        }
+
+
+def _insert_users(rows):
+    """Insert (parsed, password_hash) pairs: three executemany INSERTs"""
+    now = datetime.utcnow()
+    personal_rows = [dict(parsed[0], password_hash=password_hash, created_at=now) for parsed, password_hash in rows]
+    db.session.execute(insert(PersonalDetails), personal_rows)
+    # MySQL has no INSERT ... RETURNING, so read the new ids back by email
+    user_ids = dict(db.session.query(PersonalDetails.email, PersonalDetails.user_id).filter(
+        PersonalDetails.email.in_([row['email'] for row in personal_rows])
+    ))
+    financial_rows = [dict(parsed[1], user_id=user_ids[parsed[0]['email']]) for parsed, _ in rows if parsed[1]]
+    employment_rows = [dict(parsed[2], user_id=user_ids[parsed[0]['email']]) for parsed, _ in rows if parsed[2]]
+    if financial_rows:
+        db.session.execute(insert(FinancialDetails), financial_rows)
+    if employment_rows:
+        db.session.execute(insert(EmploymentDetails), employment_rows)
+
+
+def _import_chunk(chunk, report, hash_passwords):
+    """Insert one chunk of parsed rows: one dedupe SELECT, then bulk INSERTs
+
+    If the database rejects the chunk, it is retried a row at a time in
+    savepoints so only the offending rows are reported and the rest import.
+    """
+    emails = [parsed[0]['email'] for _, parsed in chunk]
+    existing = {email.lower() for (email,) in db.session.query(PersonalDetails.email).filter(
+        PersonalDetails.email.in_(emails)
+    )}
+    fresh = []
+    for row_number, parsed in chunk:
+        if parsed[0]['email'].lower() in existing:
+            report.error(row_number, 'User with this email already exists', parsed[0]['email'])
+        else:
+            fresh.append((row_number, parsed))
+    if not fresh:
+        return
+
+    hashes = hash_passwords([parsed[3] for _, parsed in fresh])
+    try:
+        _insert_users([(parsed, password_hash) for (_, parsed), password_hash in zip(fresh, hashes)])
+        db.session.commit()
+        report.imported += len(fresh)
+        return
+    except ROW_INSERT_ERRORS:
+        db.session.rollback()
+
+    imported = 0
+    for (row_number, parsed), password_hash in zip(fresh, hashes):
+        try:
+            with db.session.begin_nested():
+                _insert_users([(parsed, password_hash)])
+            imported += 1
+        except ROW_INSERT_ERRORS as e:
+            report.error(row_number, f'Rejected by the database: {str(e.orig)}', parsed[0]['email'])
+    db.session.commit()
+    report.imported += imported
+
+
+def import_users(rows, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+    """Bulk-create users from (row_number, dict) pairs, e.g. from iter_rows()
+
+    Rows are validated one by one, then written a chunk at a time with
+    passwords hashed in a process pool. Returns an ImportReport dict with
+    throughput and per-row errors.
+    """
+    report = ImportReport()
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def hash_passwords(passwords):
+        args = (passwords, repeat(hasher.method), repeat(hasher.salt_length))
+        if pool is None:
+            return list(map(generate_password_hash, *args))
+        return list(pool.map(generate_password_hash, *args, chunksize=max(1, len(passwords) // (workers * 4))))
+
+    seen = set()
+    chunk = []
+    try:
+        for row_number, row in rows:
+            report.rows += 1
+            if isinstance(row, ImportRowError):
+                report.error(row_number, str(row))
+                continue
+            try:
+                parsed = parse_row(row)
+            except ImportRowError as e:
+                report.error(row_number, str(e), _text(row.get('email')))
+                continue
+            email = parsed[0]['email']
+            # Emails are unique case-insensitively (MySQL's default collation)
+            if email.lower() in seen:
+                report.error(row_number, 'Duplicate email in import file', email)
+                continue
+            seen.add(email.lower())
+            chunk.append((row_number, parsed))
+            if len(chunk) >= chunk_size:
+                _import_chunk(chunk, report, hash_passwords)
+                chunk = []
+        if chunk:
+            _import_chunk(chunk, report, hash_passwords)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return report.to_dict()
@@ -0,0 +1,43 @@
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+
+from app import app as flask_app  # noqa: E402
+from models import db, PersonalDetails  # noqa: E402
+from services import auth_state  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+    # User ids are reused by the next test's fresh database
+    for cache in (auth_state._principals, auth_state._snapshots):
+        cache.clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    def make_user(email='user@example.com'):
+        user = PersonalDetails(
+            full_name='Test User', email=email, date_of_birth=date(1990, 1, 1), gender='Other',
+            nationality='Indian', marital_status='Single', contact_number='9999999999', permanent_address='-'
+        )
+        user.password_hash = '-'
+        db.session.add(user)
+        db.session.commit()
+        return user.user_id
+    return make_user
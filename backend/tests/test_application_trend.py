@@ -0,0 +1,37 @@
+from datetime import date, datetime
+
+from models import db, AdminBank, LoanApplicationDaily, LoanProduct, Loan
+from services.stats import application_trend, rebuild_daily_counts
+
+
+def add_loans(user_id, *moments):
+    bank = AdminBank(bank_name='Bank A')
+    db.session.add(bank)
+    db.session.flush()
+    for i, moment in enumerate(moments):
+        product = LoanProduct(bank_id=bank.bank_id, product_name=f'Loan {i}', min_amount=1000,
+                              max_amount=5000000, interest_rate=10.5)
+        db.session.add(product)
+        db.session.flush()
+        db.session.add(Loan(user_id=user_id, loan_product_id=product.loan_product_id, loan_amount=1000,
+                            tenure_months=12, interest_rate=10.5, monthly_emi=90, status='Pending',
+                            application_date=moment))
+    db.session.commit()
+
+
+def test_trend_reads_loans_until_seeded_without_writing(app, make_user):
+    add_loans(make_user(), datetime(2026, 3, 4, 10), datetime(2026, 3, 4, 18), datetime(2026, 3, 6, 9))
+    series = application_trend(date(2026, 3, 4), date(2026, 3, 7))
+    assert [bucket['applications'] for bucket in series] == [2, 0, 1]
+    assert LoanApplicationDaily.query.count() == 0
+
+    rebuild_daily_counts()
+    db.session.commit()
+    assert application_trend(date(2026, 3, 4), date(2026, 3, 7)) == series
+
+
+def test_partial_first_bucket_is_labelled_with_start(app, make_user):
+    add_loans(make_user(), datetime(2026, 3, 20, 10))
+    series = application_trend(date(2026, 3, 18), date(2026, 4, 10), 'month')
+    assert [bucket['period_start'] for bucket in series] == ['2026-03-18', '2026-04-01']
+    assert series[0]['applications'] == 1
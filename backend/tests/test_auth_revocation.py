@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from models import db, PersonalDetails, RevokedToken
+from services import auth_state
+
+
+def auth(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_change_password_revokes_old_token_but_not_the_new_one(client, make_user):
+    user = db.session.get(PersonalDetails, make_user())
+    user.set_password('OldPass123')
+    db.session.commit()
+    old_token = client.post('/api/auth/login', json={'email': 'user@example.com', 'password': 'OldPass123'}).get_json()['access_token']
+
+    response = client.post('/api/auth/change-password', headers=auth(old_token),
+                           json={'current_password': 'OldPass123', 'new_password': 'NewPass456'})
+    assert response.status_code == 200
+    new_token = response.get_json()['access_token']
+
+    # Both tokens were issued within the same second
+    assert client.get('/api/auth/verify-token', headers=auth(old_token)).status_code == 401
+    assert client.get('/api/auth/verify-token', headers=auth(new_token)).status_code == 200
+
+
+def test_token_without_issued_at_is_revoked_within_the_same_second(client, make_user):
+    user_id = make_user()
+    token = create_access_token(identity=str(user_id))
+    auth_state.revoke_user_tokens(user_id)
+    db.session.commit()
+    assert client.get('/api/auth/verify-token', headers=auth(token)).status_code == 401
+
+
+def test_logout_revocation_is_stored_and_never_evicted(client, make_user):
+    token = create_access_token(identity=str(make_user()))
+    assert client.post('/api/auth/logout', headers=auth(token)).status_code == 200
+    assert RevokedToken.query.count() == 1
+    # Another worker would see the same row
+    assert client.get('/api/auth/verify-token', headers=auth(token)).status_code == 401
+
+
+def test_purge_keeps_unexpired_revocations(app, make_user):
+    user_id = make_user()
+    db.session.add_all([
+        RevokedToken(jti='old', user_id=user_id, expires_at=datetime.utcnow() - timedelta(minutes=1)),
+        RevokedToken(jti='live', user_id=user_id, expires_at=datetime.utcnow() + timedelta(hours=1)),
+    ])
+    db.session.commit()
+    assert auth_state.purge_revoked_tokens() == 1
+    assert [jti for (jti,) in db.session.query(RevokedToken.jti)] == ['live']
+
+
+def test_role_change_revokes_tokens_with_the_old_role_claim(client, make_user):
+    user = db.session.get(PersonalDetails, make_user('admin@loanhub.com'))
+    token = auth_state.issue_token(user)
+    assert client.get('/api/admin/loans', headers=auth(token)).status_code == 200
+
+    user.email = 'former-admin@loanhub.com'
+    db.session.commit()
+    assert user.tokens_revoked_at is not None
+    assert client.get('/api/admin/loans', headers=auth(token)).status_code == 401
+    # Other profile edits leave tokens alone
+    fresh = auth_state.issue_token(user)
+    user.full_name = 'Renamed'
+    db.session.commit()
+    assert client.get('/api/auth/verify-token', headers=auth(fresh)).status_code == 200
@@ -0,0 +1,39 @@
+import io
+import os
+
+from models import db, DocumentBlob
+from services.blobs import blob_store
+
+
+def upload(data):
+    writer = blob_store.writer(1024 * 1024)
+    writer.copy_from(io.BytesIO(data))
+    return writer
+
+
+def test_acquire_reuses_stored_content_after_taking_a_reference(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, 'root', str(tmp_path))
+    first = upload(b'scan')
+    path = blob_store.acquire(first, 'image/png')
+    db.session.commit()
+
+    second = upload(b'scan')
+    assert blob_store.acquire(second, 'image/png') == path
+    db.session.commit()
+    assert not os.path.exists(second.temp_path)
+    assert db.session.get(DocumentBlob, first.sha256).ref_count == 2
+
+
+def test_acquire_puts_the_file_back_when_the_row_is_gone(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, 'root', str(tmp_path))
+    path = blob_store.acquire(upload(b'scan'), 'image/png')
+    db.session.commit()
+    # A release committed but its file removal has not happened yet
+    db.session.query(DocumentBlob).delete()
+    db.session.commit()
+
+    writer = upload(b'scan')
+    assert blob_store.acquire(writer, 'image/png') == path
+    db.session.commit()
+    assert os.path.exists(path) and not os.path.exists(writer.temp_path)
+    assert db.session.get(DocumentBlob, writer.sha256).ref_count == 1
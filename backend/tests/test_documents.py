@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from models import db, DocumentJob
+from services import documents
+from services.documents import MAX_ATTEMPTS, STALE_AFTER, claim_jobs, pdf_page_count
+
+
+def test_stale_jobs_out_of_attempts_fail_instead_of_requeueing(app):
+    started = datetime.utcnow() - STALE_AFTER * 2
+    exhausted = DocumentJob(sha256='a' * 64, status='Running', attempts=MAX_ATTEMPTS, started_at=started)
+    retryable = DocumentJob(sha256='b' * 64, status='Running', attempts=1, started_at=started)
+    db.session.add_all([exhausted, retryable])
+    db.session.commit()
+
+    assert claim_jobs('test-worker', 10) == [retryable.id]
+    db.session.expire_all()
+    assert exhausted.status == 'Failed' and exhausted.finished_at is not None
+    assert retryable.status == 'Running' and retryable.attempts == 2
+
+
+def test_pdf_with_object_streams_has_unknown_page_count(tmp_path, monkeypatch):
+    monkeypatch.setattr(documents, '_pypdf', lambda: None)
+    plain = tmp_path / 'plain.pdf'
+    plain.write_bytes(b'%PDF-1.4\n1 0 obj << /Type /Pages /Count 2 >>\n2 0 obj << /Type /Page >>\n'
+                      b'3 0 obj << /Type /Page >>\n%%EOF')
+    compressed = tmp_path / 'compressed.pdf'
+    compressed.write_bytes(b'%PDF-1.5\n1 0 obj << /Type /ObjStm /N 3 /First 12 >>\nstream\nx\nendstream\n%%EOF')
+    assert pdf_page_count(str(plain)) == 2
+    assert pdf_page_count(str(compressed)) is None
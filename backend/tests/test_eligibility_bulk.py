@@ -0,0 +1,34 @@
+from flask_jwt_extended import create_access_token
+
+from models import db, AdminBank, LoanProduct, FinancialDetails, EmploymentDetails
+
+URL = '/api/eligibility/check-bulk'
+
+
+def setup_applicant(make_user, monthly_income):
+    user_id = make_user()
+    db.session.add(FinancialDetails(user_id=user_id, existing_loans=0, monthly_emi=0, bank_account_details='-'))
+    db.session.add(EmploymentDetails(user_id=user_id, employment_status='Employed', monthly_income=monthly_income,
+                                     other_income=0))
+    banks = [AdminBank(bank_name='Bank A'), AdminBank(bank_name='Bank B')]
+    db.session.add_all(banks)
+    db.session.flush()
+    for bank in banks:
+        db.session.add(LoanProduct(bank_id=bank.bank_id, product_name=f'{bank.bank_name} loan',
+                                   min_amount=1000000, max_amount=5000000, interest_rate=10.5))
+    db.session.commit()
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}, banks[0].bank_id
+
+
+def test_string_bank_id_filters(app, client, make_user):
+    headers, bank_id = setup_applicant(make_user, 80000)
+    response = client.post(URL, headers=headers, json={'bank_id': str(bank_id)})
+    assert [result['bank_name'] for result in response.get_json()['results']] == ['Bank A']
+    assert client.post(URL, headers=headers, json={'bank_id': 'abc'}).status_code == 400
+
+
+def test_maximum_below_product_minimum_does_not_change_verdict(app, client, make_user):
+    headers, _ = setup_applicant(make_user, 30000)
+    results = client.post(URL, headers=headers, json={}).get_json()['results']
+    assert all(result['maximum_eligible_amount'] < 1000000 for result in results)
+    assert all(result['eligible'] for result in results)
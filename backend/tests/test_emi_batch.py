@@ -0,0 +1,33 @@
+import numpy as np
+
+from services.emi import MAX_BATCH_QUOTES
+
+URL = '/api/eligibility/calculate-emi/batch'
+
+
+def test_oversized_grid_is_rejected_before_allocation(client, monkeypatch):
+    def no_meshgrid(*args, **kwargs):
+        raise AssertionError('grid was allocated')
+
+    monkeypatch.setattr(np, 'meshgrid', no_meshgrid)
+    values = list(range(1, 5001))
+    response = client.post(URL, json={'loan_amounts': values, 'interest_rates': values, 'tenure_months': values})
+    assert response.status_code == 400
+    assert str(MAX_BATCH_QUOTES) in response.get_json()['error']
+
+
+def test_non_finite_inputs_are_rejected(client):
+    for body in (
+        '{"loan_amounts": [NaN], "interest_rates": [10], "tenure_months": [12]}',
+        '{"loan_amounts": [100000], "interest_rates": [Infinity], "tenure_months": [12]}',
+        '{"quotes": [{"loan_amount": 100000, "interest_rate": 10, "tenure_months": Infinity}]}',
+    ):
+        response = client.post(URL, data=body, content_type='application/json')
+        assert response.status_code == 400, body
+
+
+def test_grid_quotes(client):
+    response = client.post(URL, json={'loan_amounts': [100000, 200000], 'interest_rates': [0, 12],
+                                      'tenure_months': [12]})
+    assert response.status_code == 200
+    assert response.get_json()['columns']['monthly_emi'][:2] == [8333.33, 8884.88]
@@ -0,0 +1,50 @@
+from flask_jwt_extended import create_access_token
+from sqlalchemy import create_mock_engine
+from sqlalchemy.exc import IntegrityError
+
+from models import db, AdminBank, LoanProduct, Loan
+from services import idempotency
+
+URL = '/api/loans/apply'
+
+
+def setup_product(make_user):
+    headers = {'Authorization': f"Bearer {create_access_token(identity=str(make_user()))}"}
+    bank = AdminBank(bank_name='Bank A')
+    db.session.add(bank)
+    db.session.flush()
+    product = LoanProduct(bank_id=bank.bank_id, product_name='Home', min_amount=10000, max_amount=500000,
+                          interest_rate=10.5)
+    db.session.add(product)
+    db.session.commit()
+    return headers, {'loanProductId': product.loan_product_id, 'loanAmount': 20000, 'tenureMonths': 12}
+
+
+def test_second_pending_application_is_rejected(client, make_user):
+    headers, body = setup_product(make_user)
+    assert client.post(URL, headers=headers, json=body).status_code == 201
+    response = client.post(URL, headers=headers, json=body)
+    assert response.status_code == 400
+    assert 'pending application' in response.get_json()['error']
+
+
+def test_other_integrity_errors_are_not_reported_as_duplicates(client, make_user, monkeypatch):
+    headers, body = setup_product(make_user)
+
+    def fail(*args, **kwargs):
+        raise IntegrityError('INSERT INTO idempotency_keys', {}, Exception('NOT NULL constraint failed'))
+
+    monkeypatch.setattr(idempotency.idempotency_keys, 'save', fail)
+    response = client.post(URL, headers={**headers, 'Idempotency-Key': 'k1'}, json=body)
+    assert response.status_code == 500
+    assert Loan.query.count() == 0
+
+
+def test_create_all_adds_pending_unique_index_on_mysql():
+    statements = []
+    engine = create_mock_engine(
+        'mysql+pymysql://', lambda sql, *args, **kwargs: statements.append(str(sql.compile(dialect=engine.dialect)))
+    )
+    db.metadata.create_all(engine, tables=[Loan.__table__], checkfirst=False)
+    ddl = '\n'.join(statements)
+    assert 'pending_loan_product_id' in ddl and 'uq_loans_user_product_pending' in ddl
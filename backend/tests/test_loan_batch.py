@@ -0,0 +1,37 @@
+from flask_jwt_extended import create_access_token
+
+from models import db, AdminBank, LoanProduct, Loan
+
+
+def test_chunk_size_out_of_range_is_rejected(client, make_user):
+    headers = {'Authorization': f"Bearer {create_access_token(identity=str(make_user('admin@loanhub.com')))}"}
+    for chunk_size in (0, -5, 5001):
+        response = client.post(f'/api/admin/loans/batch/approve?chunk_size={chunk_size}', headers=headers,
+                               json={'loan_ids': [1]})
+        assert response.status_code == 400
+        assert 'chunk_size' in response.get_json()['error']
+
+
+def test_batch_approves_across_chunks(client, make_user):
+    admin_id = make_user('admin@loanhub.com')
+    headers = {'Authorization': f"Bearer {create_access_token(identity=str(admin_id))}"}
+    bank = AdminBank(bank_name='Bank A')
+    db.session.add(bank)
+    db.session.flush()
+    loan_ids = []
+    for i in range(3):
+        product = LoanProduct(bank_id=bank.bank_id, product_name=f'Loan {i}', min_amount=1000, max_amount=500000,
+                              interest_rate=10.5)
+        db.session.add(product)
+        db.session.flush()
+        loan = Loan(user_id=admin_id, loan_product_id=product.loan_product_id, loan_amount=20000, tenure_months=12,
+                    interest_rate=10.5, monthly_emi=1800, status='Pending')
+        db.session.add(loan)
+        db.session.flush()
+        loan_ids.append(loan.loan_id)
+    db.session.commit()
+
+    response = client.post('/api/admin/loans/batch/approve?chunk_size=2', headers=headers,
+                           json={'loan_ids': loan_ids + [999]})
+    assert response.status_code == 200
+    assert response.get_json()['summary'] == {'updated': 3, 'not_found': 1, 'invalid_status': 0, 'error': 0}
@@ -0,0 +1,55 @@
+import json
+from datetime import datetime
+
+from flask_jwt_extended import create_access_token
+
+from models import db, AdminBank, LoanProduct, Loan
+from services.pagination import encode_cursor, stream_ndjson
+from services.serializers import serialize_loans
+
+
+def add_loans(user_id, count):
+    bank = AdminBank(bank_name='Bank A')
+    db.session.add(bank)
+    db.session.flush()
+    for i in range(count):
+        product = LoanProduct(bank_id=bank.bank_id, product_name=f'Product {i}', min_amount=10000,
+                              max_amount=500000, interest_rate=10.5)
+        db.session.add(product)
+        db.session.flush()
+        # Pairs of loans share an application_date, so the loan_id tie-break matters
+        db.session.add(Loan(user_id=user_id, loan_product_id=product.loan_product_id, loan_amount=20000,
+                            tenure_months=12, interest_rate=10.5, monthly_emi=1800, status='Active',
+                            application_date=datetime(2026, 1, 1 + i // 2)))
+    db.session.commit()
+    return [loan_id for (loan_id,) in db.session.query(Loan.loan_id).order_by(
+        Loan.application_date.desc(), Loan.loan_id.desc())]
+
+
+def exported_ids(chunks):
+    return [json.loads(line)['loan_id'] for chunk in chunks for line in chunk.splitlines()]
+
+
+def test_stream_spans_chunks_and_yields_every_row_once(app, make_user):
+    expected = add_loans(make_user(), 7)
+    for chunk_size in (1, 3, 7, 100):
+        chunks = list(stream_ndjson(Loan.query, Loan, serialize_loans, chunk_size=chunk_size))
+        assert exported_ids(chunks) == expected
+        assert len(chunks) == -(-len(expected) // chunk_size)
+
+
+def test_stream_starts_after_cursor(app, make_user):
+    expected = add_loans(make_user(), 6)
+    start = db.session.get(Loan, expected[2])
+    chunks = stream_ndjson(Loan.query, Loan, serialize_loans, cursor=encode_cursor(start.application_date, start.loan_id),
+                           chunk_size=2)
+    assert exported_ids(chunks) == expected[3:]
+
+
+def test_ndjson_endpoint_rejects_bad_cursor_up_front(client, make_user):
+    headers = {'Authorization': f"Bearer {create_access_token(identity=str(make_user('admin@loanhub.com')))}"}
+    assert client.get('/api/admin/loans?format=ndjson&cursor=!!', headers=headers).status_code == 400
+    add_loans(make_user('user@example.com'), 3)
+    response = client.get('/api/admin/loans?format=ndjson', headers=headers)
+    assert response.status_code == 200
+    assert len(response.get_data(as_text=True).splitlines()) == 3
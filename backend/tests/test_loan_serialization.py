@@ -0,0 +1,72 @@
+from contextlib import contextmanager
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from models import db, AdminBank, LoanProduct, Loan
+from services.serializers import serialize_loans
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def add_loans(user_id, count):
+    """One bank and product per loan, so any per-row lazy load shows up as extra SQL"""
+    for i in range(count):
+        bank = AdminBank(bank_name=f'Bank {user_id}-{i}')
+        db.session.add(bank)
+        db.session.flush()
+        product = LoanProduct(bank_id=bank.bank_id, product_name=f'Product {i}', min_amount=10000,
+                              max_amount=500000, interest_rate=10.5)
+        db.session.add(product)
+        db.session.flush()
+        db.session.add(Loan(user_id=user_id, loan_product_id=product.loan_product_id, loan_amount=20000,
+                            tenure_months=12, interest_rate=10.5, monthly_emi=1800, status='Active'))
+    db.session.commit()
+    # Start from an empty identity map, as a fresh request would
+    db.session.expunge_all()
+
+
+def my_loans_statements(client, user_id, count):
+    add_loans(user_id, count)
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+    with count_statements() as statements:
+        response = client.get('/api/loans/my-loans', headers=headers)
+    assert response.status_code == 200
+    loans = response.get_json()['loans']
+    assert len(loans) == count
+    assert all(loan['product_name'] and loan['bank_name'] for loan in loans)
+    return len(statements)
+
+
+def serialize_statements(user_id, count):
+    add_loans(user_id, count)
+    loans = Loan.query.filter_by(user_id=user_id).order_by(Loan.loan_id).all()
+    with count_statements() as statements:
+        rows = serialize_loans(loans)
+    assert [row['product_name'] for row in rows] == [f'Product {i}' for i in range(count)]
+    assert all(row['bank_name'] for row in rows)
+    return len(statements)
+
+
+def test_my_loans_statement_count_is_constant(app, client, make_user):
+    assert my_loans_statements(client, make_user(), 5) == my_loans_statements(
+        client, make_user('other@example.com'), 40
+    )
+
+
+def test_serialize_loans_statement_count_is_constant(app, make_user):
+    small = serialize_statements(make_user(), 5)
+    large = serialize_statements(make_user('other@example.com'), 40)
+    assert small == large == 1
@@ -0,0 +1,13 @@
+from services.normalize import normalize_keys
+
+
+def test_normalize_keys_recurses_into_lists():
+    data = {'loanIds': [1, 2], 'applicants': [{'fullName': 'A', 'panCardURL': {'fileName': 'x'}}, 'raw']}
+    assert normalize_keys(data) == {
+        'loan_ids': [1, 2],
+        'applicants': [{'full_name': 'A', 'pan_card_url': {'file_name': 'x'}}, 'raw'],
+    }
+
+
+def test_normalize_keys_accepts_a_top_level_list():
+    assert normalize_keys([{'monthlyEMI': 1}]) == [{'monthly_emi': 1}]
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+from flask import Flask
+
+from services.passwords import HashingBusy, PasswordHasher
+
+
+def make_hasher(workers=1, queue=0, timeout=0.2):
+    app = Flask(__name__)
+    app.config.update(PASSWORD_HASH_METHOD='pbkdf2:sha256:1000', PASSWORD_HASH_WORKERS=workers,
+                      PASSWORD_HASH_QUEUE=queue, PASSWORD_HASH_TIMEOUT=timeout)
+    hasher = PasswordHasher()
+    hasher.init_app(app)
+    return hasher
+
+
+def test_timeout_raises_hashing_busy_and_keeps_the_slot():
+    hasher = make_hasher()
+    release = threading.Event()
+    with pytest.raises(HashingBusy):
+        hasher._run(release.wait)
+    # The timed-out job still holds the only slot until it actually finishes
+    with pytest.raises(HashingBusy):
+        hasher._run(lambda: None)
+    release.set()
+    hasher._executor.shutdown(wait=True)
+    assert hasher._slots.acquire(blocking=False)
+
+
+def test_hash_and_verify():
+    hasher = make_hasher(workers=2, timeout=5)
+    password_hash = hasher.hash('Secret123')
+    assert hasher.verify(password_hash, 'Secret123')
+    assert not hasher.verify(password_hash, 'wrong')
+
+
+def test_register_returns_503_when_busy(client, monkeypatch):
+    from services.passwords import hasher
+
+    def busy(*args):
+        raise HashingBusy('Password hashing is busy, try again shortly')
+
+    monkeypatch.setattr(hasher, '_run', busy)
+    response = client.post('/api/auth/register', json={
+        'full_name': 'New User', 'email': 'new@example.com', 'password': 'Secret123', 'contact_number': '1',
+        'date_of_birth': '1990-01-01', 'gender': 'Other', 'nationality': 'Indian', 'marital_status': 'Single',
+        'permanent_address': '-'
+    })
+    assert response.status_code == 503
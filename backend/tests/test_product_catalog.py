@@ -0,0 +1,33 @@
+from models import db, AdminBank, LoanProduct
+from services.catalog import catalog
+from services.interval_index import AmountIntervalIndex
+
+
+def add_products(ranges):
+    bank = AdminBank(bank_name='Bank')
+    db.session.add(bank)
+    db.session.flush()
+    for i, (lo, hi) in enumerate(ranges):
+        db.session.add(LoanProduct(bank_id=bank.bank_id, product_name=f'Product {i}', min_amount=lo,
+                                   max_amount=hi, interest_rate=10.5))
+    db.session.commit()
+    catalog.invalidate()
+
+
+def names(products):
+    return sorted(product['product_name'] for product in products)
+
+
+def test_amount_filter_uses_stabbing_query(app, monkeypatch):
+    add_products([(10000, 50000), (40000, 90000), (100000, 500000), (None, 60000)])
+
+    def full_overlap_scan(*args):
+        raise AssertionError('amount-only filter should not run an overlap query')
+
+    monkeypatch.setattr(AmountIntervalIndex, 'overlapping', full_overlap_scan)
+    assert names(catalog.get_products(amount=45000)) == ['Product 0', 'Product 1']
+
+
+def test_amount_with_range_filter(app):
+    add_products([(10000, 50000), (40000, 90000), (100000, 500000)])
+    assert names(catalog.get_products(min_amount=45000, max_amount=60000, amount=80000)) == ['Product 1']
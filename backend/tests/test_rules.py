@@ -0,0 +1,23 @@
+from services.rules import compile_rules
+
+APPLICANT = {'age': 30.0, 'employment_status': 'Employed', 'total_monthly_income': 15000.0, 'monthly_emi': 0.0,
+             'debt_to_income': 55.5, 'active_loans': 0}
+
+
+def test_placeholders_are_filled_from_the_applicant():
+    rules = compile_rules('debt_to_income <= 40 : Ratio too high ({debt_to_income:.1f}%) | Reduce debt below {age}')
+    assert rules.evaluate(APPLICANT) == (False, ['Ratio too high (55.5%)'], ['Reduce debt below 30.0'])
+
+
+def test_malformed_messages_are_reported_literally():
+    criteria = '; '.join([
+        'total_monthly_income >= 20000 : Income below {20,000',
+        'debt_to_income <= 40 : Ratio {ratio} too high | Pay {0} back',
+        'age >= 40 : Too young ({employment_status:.1f})',
+        'active_loans < 0 : Leaks {age.__class__}',
+    ])
+    eligible, reasons, recommendations = compile_rules(criteria).evaluate(APPLICANT)
+    assert not eligible
+    assert reasons == ['Income below {20,000', 'Ratio {ratio} too high', 'Too young ({employment_status:.1f})',
+                       'Leaks {age.__class__}']
+    assert recommendations == ['Pay {0} back']
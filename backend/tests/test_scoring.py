@@ -0,0 +1,34 @@
+import pytest
+
+from models import db, AdminBank, LoanProduct, FinancialDetails, EmploymentDetails, PreapprovedOffer
+from services import scoring
+
+
+def seed_applicant(make_user):
+    user_id = make_user()
+    db.session.add(FinancialDetails(user_id=user_id, existing_loans=0, monthly_emi=0, bank_account_details='-'))
+    db.session.add(EmploymentDetails(user_id=user_id, employment_status='Employed', monthly_income=80000,
+                                     other_income=0))
+    bank = AdminBank(bank_name='Bank')
+    db.session.add(bank)
+    db.session.flush()
+    db.session.add(LoanProduct(bank_id=bank.bank_id, product_name='Loan', min_amount=10000, max_amount=500000,
+                               interest_rate=10.5))
+    db.session.commit()
+
+
+def test_replace_keeps_old_offers_until_the_new_run_completes(app, make_user, monkeypatch):
+    seed_applicant(make_user)
+    first = scoring.run_scoring(workers=1)['run_id']
+
+    def fail(*args):
+        raise RuntimeError('scoring failed')
+
+    monkeypatch.setattr(scoring, 'score_chunk', fail)
+    with pytest.raises(RuntimeError):
+        scoring.run_scoring(workers=1)
+    assert {offer.run_id for offer in PreapprovedOffer.query} == {first}
+
+    monkeypatch.undo()
+    second = scoring.run_scoring(workers=1)['run_id']
+    assert {offer.run_id for offer in PreapprovedOffer.query} == {second}
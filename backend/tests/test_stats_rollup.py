@@ -0,0 +1,29 @@
+from models import db, LoanStatsRollup
+from services.stats import aggregate_by_status, read_rollup, rebuild_rollup, record_transition
+
+
+def test_read_rollup_does_not_seed(app):
+    assert read_rollup() == aggregate_by_status()
+    assert LoanStatsRollup.query.count() == 0
+
+
+def test_record_transition_moves_buckets(app):
+    rebuild_rollup()
+    db.session.commit()
+    record_transition(None, 'Pending', 1000)
+    record_transition('Pending', 'Approved', 1000)
+    db.session.commit()
+    rollup = read_rollup()
+    assert rollup['Pending'] == (0, 0)
+    assert rollup['Approved'] == (1, 1000)
+
+
+def test_drift_below_zero_clears_the_rollup(app, caplog):
+    rebuild_rollup()
+    db.session.commit()
+    record_transition('Pending', 'Approved', 1000)
+    db.session.commit()
+    assert 'drifted' in caplog.text
+    assert LoanStatsRollup.query.count() == 0
+    # Falls back to the loans table until rebuilt
+    assert read_rollup() == aggregate_by_status()
@@ -0,0 +1,60 @@
+import io
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import text
+
+from models import db, PersonalDetails
+from services.user_import import ImportRowError, import_users, iter_rows
+
+HEADER = 'full_name,email,contact_number,password,gender,marital_status,nationality,date_of_birth,permanent_address\n'
+ROW = 'Jane Doe,jane@example.com,9999999999,Secret123,Female,Single,Indian,1990-01-01,Somewhere'
+
+
+def test_csv_row_with_extra_fields_is_a_row_error():
+    rows = list(iter_rows(io.BytesIO((HEADER + ROW + ',surplus\n' + ROW + '\n').encode()), 'csv'))
+    assert isinstance(rows[0][1], ImportRowError)
+    assert rows[1][1]['email'] == 'jane@example.com'
+
+
+def test_admin_import_caps_workers_and_chunk_size(client, make_user):
+    headers = {'Authorization': f"Bearer {create_access_token(identity=str(make_user('admin@loanhub.com')))}"}
+    for query in ('workers=64', 'workers=0', 'chunk_size=1000000'):
+        response = client.post(f'/api/admin/users/import?format=csv&{query}', headers=headers,
+                               data=(HEADER + ROW + '\n').encode())
+        assert response.status_code == 400
+
+    response = client.post('/api/admin/users/import?format=csv&workers=1', headers=headers,
+                           data=(HEADER + ROW + ',surplus\n').encode())
+    assert response.status_code == 200
+    assert response.get_json()['errors'][0]['error'] == 'Row has more fields than the header'
+
+
+def import_csv(*rows):
+    return import_users(iter_rows(io.BytesIO((HEADER + ''.join(row + '\n' for row in rows)).encode()), 'csv'),
+                        workers=1)
+
+
+def test_values_too_long_for_their_columns_are_row_errors(app):
+    report = import_csv(ROW.replace('Female', 'F' * 21), ROW.replace('jane@', 'john@'))
+    assert report['imported'] == 1
+    assert report['errors'] == [{'row': 2, 'email': 'jane@example.com', 'error': 'gender must be at most 20 characters'}]
+
+
+def test_emails_are_deduplicated_case_insensitively(app):
+    report = import_csv(ROW, ROW.replace('jane@', 'JANE@'))
+    assert report['imported'] == 1
+    assert report['errors'][0]['error'] == 'Duplicate email in import file'
+
+
+def test_rejected_chunk_is_retried_row_by_row(app):
+    db.session.execute(text(
+        "CREATE TRIGGER reject_bad BEFORE INSERT ON personal_details WHEN NEW.full_name = 'Bad' "
+        "BEGIN SELECT RAISE(ABORT, 'bad row'); END"
+    ))
+    db.session.commit()
+    report = import_csv(ROW, ROW.replace('Jane Doe', 'Bad').replace('jane@', 'bad@'), ROW.replace('jane@', 'john@'))
+    assert report['imported'] == 2
+    assert [(error['row'], error['email']) for error in report['errors']] == [(3, 'bad@example.com')]
+    assert sorted(email for (email,) in db.session.query(PersonalDetails.email)) == [
+        'jane@example.com', 'john@example.com'
+    ]
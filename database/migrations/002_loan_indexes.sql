@@ -0,0 +1,20 @@
+-- Composite indexes for the hot loan query shapes (see `flask advise-indexes`)
+USE banking_system;
+
+-- GET /api/loans/my-loans (newest first, optionally by status); active-loan counts
+CREATE INDEX ix_loans_user_date ON loans (user_id, application_date);
+CREATE INDEX ix_loans_user_status_date ON loans (user_id, status, application_date);
+
+-- Pending-application check in POST /api/loans/apply
+CREATE INDEX ix_loans_user_product_status ON loans (user_id, loan_product_id, status);
+
+-- GET /api/admin/loans keyset pages: unfiltered, by status, by bank (via product)
+CREATE INDEX ix_loans_date_id ON loans (application_date, loan_id);
+CREATE INDEX ix_loans_status_date_id ON loans (status, application_date, loan_id);
+CREATE INDEX ix_loans_product_date_id ON loans (loan_product_id, application_date, loan_id);
+
+-- Created by db.create_all() for the old status column index=True; the
+-- (status, application_date, loan_id) index above serves every status lookup
+DROP INDEX ix_loans_status ON loans;
+
+CREATE INDEX ix_loan_products_bank_id ON loan_products (bank_id);
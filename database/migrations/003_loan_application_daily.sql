@@ -0,0 +1,21 @@
+-- Per-day application counters behind GET /api/admin/statistics/applications
+USE banking_system;
+
+CREATE TABLE IF NOT EXISTS loan_application_daily (
+    day DATE PRIMARY KEY,
+    application_count INT NOT NULL DEFAULT 0,
+    total_amount DECIMAL(18, 2) NOT NULL DEFAULT 0,
+    updated_at DATETIME
+);
+
+-- Backfill from existing loans (or run `flask rebuild-loan-stats`) while the loans
+-- table is locked, so no application lands between the snapshot and the first
+-- record_application update. Re-running replaces the counts.
+LOCK TABLES loan_application_daily WRITE, loans READ;
+DELETE FROM loan_application_daily;
+INSERT INTO loan_application_daily (day, application_count, total_amount, updated_at)
+SELECT DATE(application_date), COUNT(*), COALESCE(SUM(loan_amount), 0), UTC_TIMESTAMP()
+FROM loans
+WHERE application_date IS NOT NULL
+GROUP BY DATE(application_date);
+UNLOCK TABLES;
@@ -0,0 +1,4 @@
+-- Optimistic-concurrency version for loan status transitions (services/loan_state.py)
+USE banking_system;
+
+ALTER TABLE loans ADD COLUMN version INT NOT NULL DEFAULT 0;
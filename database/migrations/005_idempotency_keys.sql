@@ -0,0 +1,26 @@
+-- Idempotency-Key responses for POST /api/loans/apply, and one pending application per user and product
+USE banking_system;
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_id INT NOT NULL,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash VARCHAR(64) NOT NULL,
+    status_code INT NOT NULL,
+    response_body TEXT NOT NULL,
+    created_at DATETIME,
+    expires_at DATETIME NOT NULL,
+    PRIMARY KEY (user_id, idempotency_key),
+    INDEX ix_idempotency_keys_expires_at (expires_at),
+    FOREIGN KEY (user_id) REFERENCES personal_details(user_id)
+);
+
+-- MySQL has no partial indexes: a generated column that is NULL unless the loan is
+-- pending gives the same guarantee, since NULLs never collide in a unique index.
+-- Existing duplicate pending applications must be resolved before this will apply.
+ALTER TABLE loans
+    ADD COLUMN pending_loan_product_id INT
+        AS (CASE WHEN status = 'Pending' THEN loan_product_id END) VIRTUAL,
+    ADD UNIQUE INDEX uq_loans_user_product_pending (user_id, pending_loan_product_id);
+
+-- Only served the pending-application SELECT that the unique index replaces
+DROP INDEX ix_loans_user_product_status ON loans;
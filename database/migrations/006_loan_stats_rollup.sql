@@ -0,0 +1,24 @@
+-- Per-status loan counters behind GET /api/admin/statistics (services/stats.py)
+USE banking_system;
+
+CREATE TABLE IF NOT EXISTS loan_stats_rollup (
+    status VARCHAR(20) PRIMARY KEY,
+    loan_count INT NOT NULL DEFAULT 0,
+    total_amount DECIMAL(18, 2) NOT NULL DEFAULT 0,
+    updated_at DATETIME
+);
+
+-- Seed one row per status in a single statement, while the loans table is
+-- locked, so no status change lands between the snapshot and the first
+-- record_transition update. Re-running replaces the counts.
+LOCK TABLES loan_stats_rollup WRITE, loans AS l READ;
+DELETE FROM loan_stats_rollup;
+INSERT INTO loan_stats_rollup (status, loan_count, total_amount, updated_at)
+SELECT s.status, COUNT(l.loan_id), COALESCE(SUM(l.loan_amount), 0), UTC_TIMESTAMP()
+FROM (
+    SELECT 'Pending' AS status UNION ALL SELECT 'Approved' UNION ALL SELECT 'Rejected'
+    UNION ALL SELECT 'Active' UNION ALL SELECT 'Closed'
+) s
+LEFT JOIN loans l ON l.status = s.status
+GROUP BY s.status;
+UNLOCK TABLES;
@@ -0,0 +1,16 @@
+-- Offers written by `flask score-preapprovals` (services/scoring.py)
+USE banking_system;
+
+CREATE TABLE IF NOT EXISTS preapproved_offers (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    run_id VARCHAR(32) NOT NULL,
+    user_id INT NOT NULL,
+    loan_product_id INT NOT NULL,
+    maximum_eligible_amount DECIMAL(15, 2) NOT NULL,
+    tenure_months INT NOT NULL,
+    created_at DATETIME,
+    INDEX ix_preapproved_offers_run_id (run_id),
+    INDEX ix_preapproved_offers_user_id (user_id),
+    FOREIGN KEY (user_id) REFERENCES personal_details(user_id),
+    FOREIGN KEY (loan_product_id) REFERENCES loan_products(loan_product_id)
+);
@@ -0,0 +1,17 @@
+-- Content-addressed, reference-counted uploads under uploads/blobs (services/blobs.py)
+USE banking_system;
+
+CREATE TABLE IF NOT EXISTS document_blobs (
+    sha256 VARCHAR(64) PRIMARY KEY,
+    size BIGINT NOT NULL,
+    content_type VARCHAR(100),
+    ref_count INT NOT NULL DEFAULT 0,
+    created_at DATETIME,
+    page_count INT,
+    width INT,
+    height INT,
+    preview_path VARCHAR(255),
+    processed_at DATETIME
+);
+
+-- Existing user_documents paths are legacy per-user files and need no rows here
@@ -0,0 +1,16 @@
+-- Background processing queue for new document blobs (`flask process-documents`, services/documents.py)
+USE banking_system;
+
+CREATE TABLE IF NOT EXISTS document_jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    sha256 VARCHAR(64) NOT NULL,
+    status ENUM('Queued', 'Running', 'Done', 'Failed') NOT NULL DEFAULT 'Queued',
+    attempts INT NOT NULL DEFAULT 0,
+    worker VARCHAR(64),
+    last_error TEXT,
+    created_at DATETIME,
+    started_at DATETIME,
+    finished_at DATETIME,
+    INDEX ix_document_jobs_sha256 (sha256),
+    INDEX ix_document_jobs_status (status)
+);
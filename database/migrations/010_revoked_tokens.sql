@@ -0,0 +1,11 @@
+-- Tokens revoked by POST /api/auth/logout, shared by every worker process (services/auth_state.py)
+USE banking_system;
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti VARCHAR(64) PRIMARY KEY,
+    user_id INT NOT NULL,
+    expires_at DATETIME NOT NULL,
+    revoked_at DATETIME,
+    INDEX ix_revoked_tokens_expires_at (expires_at),
+    FOREIGN KEY (user_id) REFERENCES personal_details(user_id)
+);
@@ -0,0 +1,4 @@
+-- Per-user token cutoff set by password and role changes (services/auth_state.py)
+USE banking_system;
+
+ALTER TABLE personal_details ADD COLUMN tokens_revoked_at DATETIME(6) NULL;